@@ -1,47 +1,214 @@
+import hashlib
+import io
+import os
+import time
 import uuid
-from typing import Any, Dict, List
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
 
+import anyio
 from fastapi import (
     APIRouter,
     BackgroundTasks,
     Depends,
     File,
     HTTPException,
+    Request,
+    Response,
     UploadFile,
     status,
 )
+from fastapi.responses import StreamingResponse
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.core.logging_config import get_logger
-from app.db.session import get_db
-from app.schemas.document import DocumentChunkResponse, DocumentResponse
+from app.db.session import SessionLocal, get_db
+from app.models.document import DocumentChunk
+from app.schemas.document import (
+    DocumentChunkResponse,
+    DocumentResponse,
+    DocumentResponseList,
+)
 from app.services.document import DocumentService
 from app.utils.document_processor import DocumentProcessor
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+MAX_UPLOAD_SIZE = 100 * 1024 * 1024  # 100MB
+# Headroom for multipart boundaries and part headers in Content-Length
+_MULTIPART_OVERHEAD = 64 * 1024
+# Media we can never extract text from; anything else is left to the processor
+_UNSUPPORTED_CONTENT_TYPES = ("image/", "audio/", "video/")
+
+# Database check queries, built once so their compiled form is reused
+_Q_PING = text("SELECT 1")
+_Q_SCHEMA_STATE = text(
+    "SELECT"
+    " EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'document')"
+    " AS document_table_exists,"
+    " ARRAY(SELECT table_name::text FROM information_schema.tables"
+    " WHERE table_schema = 'public') AS tables,"
+    " EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'vector')"
+    " AS vector_extension"
+)
+
+# Table/extension state changes on deploys, not requests, so db-check
+# only re-inspects it once this many seconds have passed
+_SCHEMA_STATE_TTL = 30.0
+_schema_state_cache: Dict[str, Any] = {}
+
+
+def _get_schema_state(db: Session) -> Tuple[bool, List[str], bool]:
+    """
+    Return (document table exists, public tables, pgvector installed).
+
+    Results are cached for _SCHEMA_STATE_TTL seconds.
+    """
+    cached = _schema_state_cache.get("state")
+    if cached and cached[0] > time.monotonic():
+        logger.debug("Using cached database schema state")
+        return cached[1]
+
+    # Table, table list and pgvector checks in a single round trip
+    row = db.execute(_Q_SCHEMA_STATE).mappings().one()
+    table_exists = bool(row["document_table_exists"])
+    tables = list(row["tables"] or [])
+    vector_extension = bool(row["vector_extension"])
+    logger.debug(
+        "Document table exists: %s, tables: %s, pgvector extension installed: %s",
+        table_exists,
+        tables,
+        vector_extension,
+    )
+
+    state = (table_exists, tables, vector_extension)
+    _schema_state_cache["state"] = (time.monotonic() + _SCHEMA_STATE_TTL, state)
+    return state
+
+
+def _read_upload(upload_file: BinaryIO, max_size: int) -> Union[bytes, bytearray]:
+    """
+    Read an upload's underlying file in one call.
+
+    Runs on a worker thread; reads at most one byte past the limit so
+    oversized uploads without a known size can still be rejected.
+    """
+    fd = _disk_fileno(upload_file)
+    if fd is not None and hasattr(os, "preadv"):
+        return _read_spooled_to_disk(fd, max_size)
 
-async def process_document_background(db: Session, document_id: str):
-    """Background task for processing documents."""
+    upload_file.seek(0)
+    return upload_file.read(max_size + 1)
+
+
+def _disk_fileno(upload_file: BinaryIO) -> Optional[int]:
+    """Return the descriptor of the real file behind an upload, if it has one."""
+    # An in-memory SpooledTemporaryFile has no name, and calling fileno() on
+    # it would roll it over to disk just to read it back
+    if getattr(upload_file, "name", None) is None:
+        return None
     try:
-        logger.info(f"Starting background processing of document {document_id}")
-        document = DocumentService.get_document_by_id(db=db, document_id=document_id)
-        if document:
-            logger.debug(f"Document {document_id} found, processing...")
-            DocumentService.process_document(db=db, document=document)
-            logger.info(f"Document {document_id} processed successfully")
-        else:
-            logger.error(f"Document {document_id} not found for processing")
+        return upload_file.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _read_spooled_to_disk(fd: int, max_size: int) -> bytearray:
+    """
+    Read a disk-backed upload with positional reads straight into one buffer.
+
+    The buffer is sized from the file itself, so large uploads are pulled
+    in with as few syscalls as the kernel allows and without going through
+    the buffered file layer.
+    """
+    size = min(os.fstat(fd).st_size, max_size + 1)
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    offset = 0
+    while offset < size:
+        read = os.preadv(fd, [view[offset:]], offset)
+        if read == 0:
+            break
+        offset += read
+    view.release()
+    del buffer[offset:]
+    return buffer
+
+
+def process_document_background(document_id: str):
+    """
+    Background task for processing documents.
+
+    Declared as a plain function so Starlette runs it in its thread pool
+    rather than on the event loop. Uses its own session, since the
+    request-scoped one is closed once the response has been sent.
+    """
+    try:
+        logger.info("Starting background processing of document %s", document_id)
+        with SessionLocal() as db:
+            document = DocumentService.get_document_by_id(
+                db=db, document_id=document_id
+            )
+            if document:
+                logger.debug("Document %s found, processing...", document_id)
+                DocumentService.process_document(db=db, document=document)
+                logger.info("Document %s processed successfully", document_id)
+            else:
+                logger.error("Document %s not found for processing", document_id)
+    except Exception as e:
+        logger.error("Error processing document %s: %s", document_id, e, exc_info=True)
+
+
+def _stream_chunks_json(
+    chunks: Iterator[DocumentChunk], document_id: uuid.UUID
+) -> Iterator[bytes]:
+    """
+    Serialize chunks into a JSON array one row at a time.
+
+    Keeps memory flat regardless of how many chunks a document has.
+    """
+    count = 0
+    yield b"["
+    try:
+        for chunk in chunks:
+            if count:
+                yield b","
+            yield DocumentChunkResponse.model_validate(chunk).model_dump_json().encode()
+            count += 1
     except Exception as e:
+        # Headers are already sent; re-raising aborts the response, so the
+        # client sees a broken body instead of a silently truncated array
         logger.error(
-            f"Error processing document {document_id}: {str(e)}", exc_info=True
+            "Error streaming document chunks for %s: %s", document_id, e, exc_info=True
         )
+        raise
+    yield b"]"
+    logger.debug("Streamed %s chunks for document %s", count, document_id)
+
+
+def _make_etag(*parts: Any) -> str:
+    """Build a quoted strong ETag from the values a response depends on."""
+    digest = hashlib.md5(
+        ":".join(str(part) for part in parts).encode(), usedforsecurity=False
+    )
+    return f'"{digest.hexdigest()}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the request's If-None-Match header covers etag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(
+        tag.removeprefix("W/") == etag for tag in candidates
+    )
 
 
 @router.post("/", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
 async def upload_document(
+    request: Request,
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -51,42 +218,69 @@ async def upload_document(
     Supports text files, PDF, and DOCX document formats.
     """
     try:
-        logger.info(f"Document upload started: {file.filename}")
-
-        # Check file size (limit to 100MB)
-        file_size = 0
-        chunk_size = 1024 * 4  # 4KB chunks
-        content_chunks = []
-
-        logger.debug(f"Reading file {file.filename} in chunks")
-        while chunk := await file.read(chunk_size):
-            file_size += len(chunk)
-            content_chunks.append(chunk)
-
-            # Check size limit
-            if file_size > 100 * 1024 * 1024:  # 100MB
-                logger.warning(f"File {file.filename} too large: {file_size} bytes")
-                raise HTTPException(
-                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                    detail="File too large. Maximum file size is 100MB.",
-                )
-
-        # Reset file position
-        await file.seek(0)
-        logger.debug(f"File size: {file_size} bytes")
-
-        # Read file content
-        content = b"".join(content_chunks)
-        
-        # Extract text using document processor
+        logger.info("Document upload started: %s", file.filename)
+
+        # Reject from the headers alone before touching the spooled body
+        try:
+            content_length = int(request.headers.get("content-length", 0))
+        except ValueError:
+            content_length = 0
+        if content_length > MAX_UPLOAD_SIZE + _MULTIPART_OVERHEAD:
+            logger.warning(
+                "Upload %s too large: Content-Length %s",
+                file.filename,
+                content_length,
+            )
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="File too large. Maximum file size is 100MB.",
+            )
+
+        if file.content_type and file.content_type.startswith(
+            _UNSUPPORTED_CONTENT_TYPES
+        ):
+            logger.warning(
+                "Unsupported content type for %s: %s",
+                file.filename,
+                file.content_type,
+            )
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Unsupported file type. Please upload a text file, PDF, or DOCX document.",
+            )
+
+        # Check file size (limit to 100MB) before reading anything
+        if file.size is not None and file.size > MAX_UPLOAD_SIZE:
+            logger.warning("File %s too large: %s bytes", file.filename, file.size)
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="File too large. Maximum file size is 100MB.",
+            )
+
+        logger.debug("Reading file %s", file.filename)
+        content = await anyio.to_thread.run_sync(
+            _read_upload, file.file, MAX_UPLOAD_SIZE
+        )
+
+        # Size may be unknown up-front, so check what was actually read
+        if len(content) > MAX_UPLOAD_SIZE:
+            logger.warning("File %s too large: %s bytes", file.filename, len(content))
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="File too large. Maximum file size is 100MB.",
+            )
+
+        logger.debug("File size: %s bytes", len(content))
+
+        # Extract text using document processor. PDF/DOCX parsing is CPU-bound,
+        # so it runs on a worker thread instead of blocking the event loop.
         try:
-            content_str, detected_content_type = DocumentProcessor.extract_text(
-                content=content, 
-                filename=file.filename
+            content_str, detected_content_type = await anyio.to_thread.run_sync(
+                DocumentProcessor.extract_text, content, file.filename
             )
             
             # Create document in database
-            logger.debug(f"Creating document record in database for {file.filename}")
+            logger.debug("Creating document record in database for %s", file.filename)
             document = DocumentService.create_document(
                 db=db,
                 filename=file.filename,
@@ -95,13 +289,13 @@ async def upload_document(
             )
 
             # Process document in background
-            logger.info(f"Scheduling background processing for document {document.id}")
+            logger.info("Scheduling background processing for document %s", document.id)
             background_tasks.add_task(
-                process_document_background, db=db, document_id=str(document.id)
+                process_document_background, document_id=str(document.id)
             )
 
             logger.info(
-                f"Document {document.id} uploaded successfully, processing scheduled"
+                "Document %s uploaded successfully, processing scheduled", document.id
             )
             return {
                 "id": document.id,
@@ -113,7 +307,7 @@ async def upload_document(
             # Re-raise HTTP exceptions
             raise
         except Exception as e:
-            logger.error(f"Error processing document upload: {str(e)}", exc_info=True)
+            logger.error("Error processing document upload: %s", e, exc_info=True)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error processing document: {str(e)}",
@@ -122,7 +316,7 @@ async def upload_document(
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        logger.error(f"Error processing document upload: {str(e)}", exc_info=True)
+        logger.error("Error processing document upload: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing document: {str(e)}",
@@ -130,25 +324,53 @@ async def upload_document(
 
 
 @router.get("/", response_model=List[DocumentResponse], status_code=status.HTTP_200_OK)
-async def get_documents(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_documents(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+):
     """
     Retrieve all uploaded documents with pagination.
     """
     try:
-        logger.info(f"Retrieving documents (skip={skip}, limit={limit})")
+        logger.info("Retrieving documents (skip=%s, limit=%s)", skip, limit)
         documents = DocumentService.get_all_documents(db=db, skip=skip, limit=limit)
-        logger.debug(f"Found {len(documents)} documents")
-        return [
-            {
-                "id": doc.id,
-                "filename": doc.filename,
-                "status": "Processed" if doc.chunk_ids else "Processing",
-                "created_at": doc.created_at,
-            }
-            for doc in documents
-        ]
+        logger.debug("Found %s documents", len(documents))
+
+        # The page changes when a row is added, removed, updated or processed
+        etag = _make_etag(
+            *(
+                f"{doc.id}/{doc.updated_at}/{int(doc.is_processed)}"
+                for doc in documents
+            )
+        )
+        if _etag_matches(request, etag):
+            logger.debug("Document list unchanged, returning 304")
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+        # Serialize the page in one TypeAdapter pass rather than letting
+        # FastAPI validate and encode each item
+        items = DocumentResponseList.validate_python(
+            [
+                {
+                    "id": doc.id,
+                    "filename": doc.filename,
+                    "status": "Processed" if doc.is_processed else "Processing",
+                    "created_at": doc.created_at,
+                }
+                for doc in documents
+            ]
+        )
+        return Response(
+            content=DocumentResponseList.dump_json(items),
+            media_type="application/json",
+            headers={"ETag": etag},
+        )
     except Exception as e:
-        logger.error(f"Error retrieving documents: {str(e)}", exc_info=True)
+        logger.error("Error retrieving documents: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving documents: {str(e)}",
@@ -161,23 +383,20 @@ async def delete_document(document_id: uuid.UUID, db: Session = Depends(get_db))
     Delete a document by ID.
     """
     try:
-        logger.info(f"Deleting document {document_id}")
-        document = DocumentService.get_document_by_id(
-            db=db, document_id=str(document_id)
-        )
-        if not document:
-            logger.warning(f"Document {document_id} not found for deletion")
+        logger.info("Deleting document %s", document_id)
+        deleted = DocumentService.delete_document(db=db, document_id=str(document_id))
+        if not deleted:
+            logger.warning("Document %s not found for deletion", document_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Document with ID {document_id} not found",
             )
 
-        DocumentService.delete_document(db=db, document_id=str(document_id))
-        logger.info(f"Document {document_id} deleted successfully")
+        logger.info("Document %s deleted successfully", document_id)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting document {document_id}: {str(e)}", exc_info=True)
+        logger.error("Error deleting document %s: %s", document_id, e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting document: {str(e)}",
@@ -187,35 +406,49 @@ async def delete_document(document_id: uuid.UUID, db: Session = Depends(get_db))
 @router.get(
     "/{document_id}", response_model=DocumentResponse, status_code=status.HTTP_200_OK
 )
-async def get_document(document_id: uuid.UUID, db: Session = Depends(get_db)):
+async def get_document(
+    document_id: uuid.UUID,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+):
     """
     Retrieve a document by ID.
+
+    Responses carry an ETag so clients polling for processing status can
+    revalidate with If-None-Match and get a bodiless 304.
     """
     try:
-        logger.info(f"Retrieving document {document_id}")
-        document = DocumentService.get_document_by_id(
+        logger.info("Retrieving document %s", document_id)
+        document = DocumentService.get_document_summary(
             db=db, document_id=str(document_id)
         )
         if not document:
-            logger.warning(f"Document {document_id} not found")
+            logger.warning("Document %s not found", document_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Document with ID {document_id} not found",
             )
 
-        logger.debug(f"Document {document_id} retrieved successfully")
+        logger.debug("Document %s retrieved successfully", document_id)
+        etag = _make_etag(document.id, document.updated_at, int(document.is_processed))
+        if _etag_matches(request, etag):
+            logger.debug("Document %s unchanged, returning 304", document_id)
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+        response.headers["ETag"] = etag
+
         return {
             "id": document.id,
             "filename": document.filename,
-            "status": "Processed" if document.chunk_ids else "Processing",
+            "status": "Processed" if document.is_processed else "Processing",
             "created_at": document.created_at,
         }
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(
-            f"Error retrieving document {document_id}: {str(e)}", exc_info=True
-        )
+        logger.error("Error retrieving document %s: %s", document_id, e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving document: {str(e)}",
@@ -232,38 +465,29 @@ async def get_document_chunks(document_id: uuid.UUID, db: Session = Depends(get_
     Retrieve all chunks for a document.
     """
     try:
-        logger.info(f"Retrieving chunks for document {document_id}")
-        document = DocumentService.get_document_by_id(
+        logger.info("Retrieving chunks for document %s", document_id)
+        document = DocumentService.get_document_summary(
             db=db, document_id=str(document_id)
         )
         if not document:
-            logger.warning(f"Document {document_id} not found when retrieving chunks")
+            logger.warning("Document %s not found when retrieving chunks", document_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Document with ID {document_id} not found",
             )
 
-        chunks = DocumentService.get_document_chunks(
+        chunks = DocumentService.iter_document_chunks(
             db=db, document_id=str(document_id)
         )
-        logger.debug(f"Retrieved {len(chunks)} chunks for document {document_id}")
-        return [
-            {
-                "id": chunk.id,
-                "document_id": chunk.document_id,
-                "chunk_index": chunk.chunk_index,
-                "content": chunk.content,
-                "token_count": chunk.token_count,
-                "created_at": chunk.created_at,
-            }
-            for chunk in chunks
-        ]
+        return StreamingResponse(
+            _stream_chunks_json(chunks, document_id),
+            media_type="application/json",
+        )
     except HTTPException:
         raise
     except Exception as e:
         logger.error(
-            f"Error retrieving document chunks for {document_id}: {str(e)}",
-            exc_info=True,
+            "Error retrieving document chunks for %s: %s", document_id, e, exc_info=True
         )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -279,44 +503,14 @@ async def check_db_connection(db: Session = Depends(get_db)):
     try:
         logger.info("Running database connection check")
         # Try to execute a simple query to check the connection
-        result = db.execute(text("SELECT 1")).scalar()
-        logger.debug(f"Database connection check result: {result}")
-
-        # Check if document table exists
-        table_exists = db.execute(
-            text(
-                "SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'document')"
-            )
-        ).scalar()
-        logger.debug(f"Document table exists: {table_exists}")
-
-        # Get all tables in the database
-        tables = (
-            db.execute(
-                text(
-                    "SELECT table_name FROM information_schema.tables WHERE table_schema='public'"
-                )
-            )
-            .scalars()
-            .all()
-        )
-        logger.debug(f"Database tables: {tables}")
+        result = db.execute(_Q_PING).scalar()
+        logger.debug("Database connection check result: %s", result)
 
-        # Check if pgvector extension is installed
-        try:
-            vector_extension = db.execute(
-                text(
-                    "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'vector')"
-                )
-            ).scalar()
-            logger.debug(f"pgvector extension installed: {vector_extension}")
-        except Exception as e:
-            logger.warning(f"Error checking pgvector extension: {str(e)}")
-            vector_extension = False
+        table_exists, tables, vector_extension = _get_schema_state(db)
 
         # Check database connection details
         db_url = str(db.bind.url).replace(":*****@", "@")  # Hide password
-        logger.debug(f"Database URL: {db_url}")
+        logger.debug("Database URL: %s", db_url)
 
         logger.info("Database check completed")
         return {
@@ -333,7 +527,7 @@ async def check_db_connection(db: Session = Depends(get_db)):
             else None,
         }
     except Exception as e:
-        logger.error(f"Error checking database connection: {str(e)}", exc_info=True)
+        logger.error("Error checking database connection: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database connection error: {str(e)}",
@@ -1,26 +1,32 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, File, UploadFile, status
+import orjson
+from fastapi import APIRouter, Response
 
 router = APIRouter()
 
+_GUIDELINES = [
+    {
+        "id": 1,
+        "title": "Usage Guideline 1",
+        "description": "This is a description for usage guideline 1.",
+    },
+    {
+        "id": 2,
+        "title": "Usage Guideline 2",
+        "description": "This is a description for usage guideline 2.",
+    },
+    {
+        "id": 3,
+        "title": "Usage Guideline 3",
+        "description": "This is a description for usage guideline 3.",
+    },
+]
+
+# The payload never changes, so serialize it once at import time
+_GUIDELINES_BYTES = orjson.dumps(_GUIDELINES)
+
 
 @router.get("/", response_model=List[object])
 async def get_guidelines():
-    return [
-        {
-            "id": 1,
-            "title": "Usage Guideline 1",
-            "description": "This is a description for usage guideline 1.",
-        },
-        {
-            "id": 2,
-            "title": "Usage Guideline 2",
-            "description": "This is a description for usage guideline 2.",
-        },
-        {
-            "id": 3,
-            "title": "Usage Guideline 3",
-            "description": "This is a description for usage guideline 3.",
-        },
-    ]
+    return Response(content=_GUIDELINES_BYTES, media_type="application/json")
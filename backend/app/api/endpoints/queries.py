@@ -1,4 +1,9 @@
+from typing import Any, Dict, Iterator, List, Optional
+
+import orjson
 from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 import logging
 
@@ -21,19 +26,22 @@ async def query_documents(
     Query against embedded documents and return AI-generated answers.
     """
     try:
-        logger.info(f"Processing query: '{query.question}'")
+        logger.info("Processing query: '%s'", query.question)
         
-        # Get the model provider for embeddings
-        model_provider = get_model_provider()
-        # Step 1: Search for relevant document chunks using the search service
-        relevant_chunks = SearchService.search_documents(
-            db=db, 
-            query=query.question, 
-            limit=query.top_k
+        # Step 1: Search for relevant document chunks using the search service.
+        # Embedding the question and querying the database both block, so
+        # they run in the thread pool rather than on the event loop
+        relevant_chunks = await run_in_threadpool(
+            SearchService.search_documents,
+            db=db,
+            query=query.question,
+            limit=query.top_k,
         )
         
         if not relevant_chunks:
-            logger.warning(f"No relevant documents found for query: '{query.question}'")
+            logger.warning(
+                "No relevant documents found for query: '%s'", query.question
+            )
             return QueryResponse(
                 question=query.question,
                 answer="I couldn't find any relevant information to answer your question.",
@@ -46,19 +54,20 @@ async def query_documents(
         # Step 3: Generate a combined context string
         combined_context = "\n\n".join(contexts)
         
-        # Step 4: Create a system prompt to ensure the model only uses provided context
-        system_prompt = """You are a helpful assistant answering questions based on the provided document chunks.
-                        Only use information from the provided context to answer the question.
-                        If the context doesn't contain the information needed to answer the question, say so clearly.
-                        Do not make up or infer information that is not explicitly stated in the context. 
-                        Also provide clear and concise answers with a single line response if its a simple question, without much meandering around the question."""
-        
         # Step 4: Use the model to generate an answer based on the question and context
-        completion_result = model_provider.generate_completion(
+        # The question was already embedded for retrieval; reuse it. On a
+        # cache miss (the question couldn't be embedded) this calls the
+        # provider again, so it stays off the event loop too
+        query_embedding = await run_in_threadpool(
+            SearchService.get_query_embedding, query.question
+        )
+        model_provider = get_model_provider()
+        completion_result = await model_provider.generate_completion_async(
             prompt=query.question,
             context=combined_context,
             temperature=0.7,
-            max_tokens=500
+            max_tokens=500,
+            query_embedding=query_embedding,
         )
         
         # Step 5: Prepare the sources information
@@ -72,5 +81,86 @@ async def query_documents(
         )
         
     except Exception as e:
-        logger.error(f"Error processing query: {str(e)}", exc_info=True)
+        logger.error("Error processing query: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+
+
+def _sse_event(data: Any, event: Optional[str] = None) -> bytes:
+    """Encode one server-sent event with a JSON payload."""
+    prefix = f"event: {event}\n".encode() if event else b""
+    return prefix + b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+def _stream_answer(
+    question: str, relevant_chunks: List[Dict[str, Any]]
+) -> Iterator[bytes]:
+    """
+    Yield the answer as SSE events: the sources, then text fragments as the
+    model generates them, then a done event.
+
+    A plain generator, so Starlette iterates it in its thread pool and the
+    blocking provider stream never runs on the event loop.
+    """
+    sources = [
+        f"{chunk['document_filename']} (Chunk {chunk['chunk_index'] + 1})"
+        for chunk in relevant_chunks
+    ]
+    yield _sse_event(sources, event="sources")
+
+    try:
+        model_provider = get_model_provider()
+        for fragment in model_provider.generate_completion_stream(
+            prompt=question,
+            context="\n\n".join(chunk["content"] for chunk in relevant_chunks),
+            temperature=0.7,
+            max_tokens=500,
+            query_embedding=SearchService.get_query_embedding(question),
+        ):
+            yield _sse_event(fragment)
+    except Exception as e:
+        logger.error("Error streaming answer: %s", e, exc_info=True)
+        yield _sse_event(f"Error processing query: {str(e)}", event="error")
+
+    yield _sse_event(None, event="done")
+
+
+@router.post("/stream")
+async def stream_query_documents(
+    query: QueryRequest = Body(...),
+    db: Session = Depends(get_db),
+):
+    """
+    Query against embedded documents and stream the answer as server-sent
+    events, so the first tokens reach the client while the rest is generated.
+    """
+    try:
+        logger.info("Processing streaming query: '%s'", query.question)
+        relevant_chunks = await run_in_threadpool(
+            SearchService.search_documents,
+            db=db,
+            query=query.question,
+            limit=query.top_k,
+        )
+    except Exception as e:
+        logger.error("Error processing query: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+
+    if not relevant_chunks:
+        logger.warning("No relevant documents found for query: '%s'", query.question)
+        events = iter(
+            [
+                _sse_event([], event="sources"),
+                _sse_event(
+                    "I couldn't find any relevant information to answer your question."
+                ),
+                _sse_event(None, event="done"),
+            ]
+        )
+    else:
+        events = _stream_answer(query.question, relevant_chunks)
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
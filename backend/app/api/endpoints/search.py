@@ -1,11 +1,12 @@
 from typing import Any, Dict
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.core.logging_config import get_logger
 from app.db.session import get_db
-from app.schemas.document import DocumentSearchQuery, SearchResponse
+from app.schemas.document import DocumentSearchQuery, SearchResponse, SearchResultList
 from app.services.search import SearchService
 
 router = APIRouter()
@@ -21,20 +22,34 @@ async def search_documents(
     """
     try:
         logger.info(
-            f"Performing search with query: '{search_query.query}', limit: {search_query.limit}"
+            "Performing search with query: '%s', limit: %s",
+            search_query.query,
+            search_query.limit,
         )
 
-        # Search for document chunks that match the query
-        results = SearchService.search_documents(
-            db=db, query=search_query.query, limit=search_query.limit
+        # Search for document chunks that match the query; the embedding
+        # call and database round trips block, so run them in the thread pool
+        results = await run_in_threadpool(
+            SearchService.search_documents,
+            db=db,
+            query=search_query.query,
+            limit=search_query.limit,
         )
 
-        logger.debug(f"Search found {len(results)} results")
+        logger.debug("Search found %s results", len(results))
 
-        # Return search results
-        return {"results": results, "total": len(results), "query": search_query.query}
+        # Validate the results as one list, then serialize the response
+        # directly instead of having FastAPI re-validate it per item
+        payload = SearchResponse.model_construct(
+            results=SearchResultList.validate_python(results),
+            total=len(results),
+            query=search_query.query,
+        )
+        return Response(
+            content=payload.model_dump_json(), media_type="application/json"
+        )
     except Exception as e:
-        logger.error(f"Error searching documents: {str(e)}", exc_info=True)
+        logger.error("Error searching documents: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error searching documents: {str(e)}",
@@ -1,16 +1,25 @@
 import os
 import secrets
-from typing import Any, Dict, List, Literal, Optional, Union
+from functools import cached_property, lru_cache
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
 
 from dotenv import load_dotenv
-from pydantic import AnyHttpUrl, PostgresDsn, ValidationInfo, field_validator
+from pydantic import (
+    AnyHttpUrl,
+    PostgresDsn,
+    ValidationInfo,
+    computed_field,
+    field_validator,
+)
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 load_dotenv()
 
 
 class Settings(BaseSettings):
-    model_config = SettingsConfigDict(case_sensitive=True, env_file=".env")
+    model_config = SettingsConfigDict(
+        case_sensitive=True, env_file=".env", frozen=True
+    )
 
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = secrets.token_urlsafe(32)
@@ -40,14 +49,27 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "doc_query"
     POSTGRES_PORT: int = 5432
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
+    # Connection pool tuning, sized for concurrent requests per worker
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800  # seconds
+
+    @computed_field
+    @cached_property
+    def cors_origins_str(self) -> Tuple[str, ...]:
+        """CORS origins as plain strings, converted once per Settings instance."""
+        return tuple(str(origin) for origin in self.BACKEND_CORS_ORIGINS)
 
     @field_validator("BACKEND_CORS_ORIGINS", mode="before")
     def assemble_cors_origins(
         cls, v: Union[str, List[str]], info: ValidationInfo
     ) -> Union[List[str], str]:
+        # Already a list (or unset): nothing to split
+        if isinstance(v, list) or v == "":
+            return v or []
         if isinstance(v, str) and not v.startswith("["):
             return [i.strip() for i in v.split(",")]
-        elif isinstance(v, (list, str)):
+        elif isinstance(v, str):
             return v
         raise ValueError(v)
 
@@ -69,9 +91,7 @@ class Settings(BaseSettings):
 
     @field_validator("POSTGRES_PORT", mode="before")
     def validate_port(cls, v: Any) -> int:
-        if isinstance(v, str):
-            return int(v)
-        return v
+        return int(v) if isinstance(v, str) else v
 
     # Model Provider Settings
     MODEL_PROVIDER: Literal["openai", "local", "huggingface"] = "openai"
@@ -86,6 +106,9 @@ class Settings(BaseSettings):
         "LOCAL_MODEL_SERVER_URL", "http://localhost:8080"
     )
 
+    # Shared cache for query embeddings across worker processes; empty disables it
+    REDIS_URL: str = os.getenv("REDIS_URL", "")
+
     # HuggingFace Settings
     HUGGINGFACE_API_KEY: str = os.getenv("HUGGINGFACE_API_KEY", "")
 
@@ -93,6 +116,11 @@ class Settings(BaseSettings):
     VECTOR_COLLECTION_NAME: str = os.getenv(
         "VECTOR_COLLECTION_NAME", "document_embeddings"
     )
+    # Two-stage vector search: candidates from a binary-quantized HNSW index,
+    # re-ranked by exact halfvec distance. Needs the index built by
+    # db_scripts/migrate_embedding_to_vector.py --binary-index.
+    BINARY_QUANTIZED_SEARCH: bool = False
+    BINARY_SEARCH_CANDIDATES: int = 100
 
     # Default Model Names
     EMBEDDING_MODEL: str = os.getenv(
@@ -121,4 +149,10 @@ class Settings(BaseSettings):
     )  # OpenAI default, may change with other models
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide Settings, built (and validated) only once."""
+    return Settings()
+
+
+settings = get_settings()
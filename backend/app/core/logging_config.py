@@ -1,8 +1,12 @@
 """Centralized logging configuration for the application."""
 
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
+import threading
 from datetime import datetime
 from pathlib import Path
 
@@ -10,15 +14,126 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 LOG_DIR = "logs"
 
+# Resolved once; getLevelNamesMapping() would need Python 3.11, so look the
+# name up with getLevelName(), which returns an int for known level names
+_LEVEL = logging.getLevelName(LOG_LEVEL.upper())
+if not isinstance(_LEVEL, int):
+    _LEVEL = logging.INFO
+# Formatters keep no per-record state, so every handler can share one
+_FORMATTER = logging.Formatter(LOG_FORMAT)
+# Buffered file records are written once this many pile up, on ERROR, or on
+# the periodic flush, whichever comes first
+LOG_BUFFER_CAPACITY = 1024
+LOG_FLUSH_INTERVAL = 1.0
+# Rotate the log file at this size, keeping this many old files
+LOG_MAX_BYTES = 64 * 1024 * 1024
+LOG_BACKUP_COUNT = 7
+
 # Create logs directory if it doesn't exist
 Path(LOG_DIR).mkdir(exist_ok=True)
 
 
+class BatchRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler that can write a batch of records with a single
+    write() and flush(), instead of one of each (plus a rollover check) per
+    record as emit() does.
+    """
+
+    def emit_batch(self, records):
+        """Write the records this handler accepts, rolling over first if needed."""
+        # The same level and filter checks a record goes through on its own
+        records = [
+            record
+            for record in records
+            if record.levelno >= self.level and self.filter(record)
+        ]
+        if not records:
+            return
+        with self.lock:
+            try:
+                data = "".join(
+                    self.format(record) + self.terminator for record in records
+                )
+                if self.stream is None:
+                    self.stream = self._open()
+                # maxBytes counts bytes; ASCII text has one byte per character
+                if data.isascii():
+                    size = len(data)
+                else:
+                    size = len(data.encode(self.encoding or "utf-8"))
+                # Never roll over anything other than a regular file (bpo-45401)
+                # or an empty one, which a single oversized batch would loop on
+                if self.maxBytes > 0 and os.path.isfile(self.baseFilename):
+                    self.stream.seek(0, 2)
+                    position = self.stream.tell()
+                    if position and position + size > self.maxBytes:
+                        self.doRollover()
+                        if self.stream is None:
+                            self.stream = self._open()
+                self.stream.write(data)
+                self.flush()
+            except Exception:
+                self.handleError(records[-1])
+
+
+class BatchFileHandler(logging.handlers.MemoryHandler):
+    """
+    MemoryHandler that hands each flushed batch to its target in one call.
+
+    A BatchRotatingFileHandler target writes the whole batch at once; any
+    other target gets the records one by one, as with a plain MemoryHandler.
+    """
+
+    def flush(self):
+        emit_batch = getattr(self.target, "emit_batch", None)
+        if emit_batch is None:
+            super().flush()
+            return
+        with self.lock:
+            try:
+                if self.buffer:
+                    emit_batch(self.buffer)
+            finally:
+                self.buffer.clear()
+
+
+# Background listener that owns the real handlers; set by configure_logging()
+_listener = None
+# Signals the periodic flush thread to exit
+_flush_stop = None
+
+
+def _flush_periodically(handler, interval, stop):
+    """Flush a buffering handler every interval seconds until stop is set."""
+    while not stop.wait(interval):
+        handler.flush()
+
+
+def _stop_listener():
+    """Stop the queue listener, flushing queued records and closing its handlers."""
+    global _listener, _flush_stop
+    if _flush_stop is not None:
+        _flush_stop.set()
+        _flush_stop = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            # MemoryHandler.close() flushes but leaves its target open
+            target = getattr(handler, "target", None)
+            handler.close()
+            if target is not None:
+                target.close()
+        _listener = None
+
+
 # Configure the root logger
 def configure_logging():
     """Configure the root logger with console and file handlers."""
+    global _listener, _flush_stop
+
     root_logger = logging.getLogger()
-    root_logger.setLevel(getattr(logging, LOG_LEVEL))
+    root_logger.setLevel(_LEVEL)
 
     # Clear existing handlers to avoid duplicates when reconfiguring
     if root_logger.handlers:
@@ -26,20 +141,48 @@ def configure_logging():
 
     # Create console handler
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(getattr(logging, LOG_LEVEL))
-    console_formatter = logging.Formatter(LOG_FORMAT)
-    console_handler.setFormatter(console_formatter)
+    console_handler.setLevel(_LEVEL)
+    console_handler.setFormatter(_FORMATTER)
 
     # Create file handler
     log_filename = f"{LOG_DIR}/app-{datetime.now().strftime('%Y-%m-%d')}.log"
-    file_handler = logging.FileHandler(log_filename)
-    file_handler.setLevel(getattr(logging, LOG_LEVEL))
-    file_formatter = logging.Formatter(LOG_FORMAT)
-    file_handler.setFormatter(file_formatter)
+    # delay=True: no file descriptor is opened until the first batch is written
+    file_handler = BatchRotatingFileHandler(
+        log_filename,
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding="utf-8",
+        delay=True,
+    )
+    file_handler.setLevel(_LEVEL)
+    file_handler.setFormatter(_FORMATTER)
 
-    # Add handlers to root logger
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
+    # Batch file writes into one write() per flush instead of one per record
+    buffered_file_handler = BatchFileHandler(
+        capacity=LOG_BUFFER_CAPACITY,
+        flushLevel=logging.ERROR,
+        target=file_handler,
+        flushOnClose=True,
+    )
+    buffered_file_handler.setLevel(_LEVEL)
+
+    # Request threads only enqueue records; formatting and writes to the
+    # console and log file happen on the listener's background thread
+    _stop_listener()
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(
+        log_queue, console_handler, buffered_file_handler, respect_handler_level=True
+    )
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _listener.start()
+
+    _flush_stop = threading.Event()
+    threading.Thread(
+        target=_flush_periodically,
+        args=(buffered_file_handler, LOG_FLUSH_INTERVAL, _flush_stop),
+        name="log-flush",
+        daemon=True,
+    ).start()
 
     # SQLAlchemy logging is very verbose, set it to WARNING level
     logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
@@ -47,6 +190,9 @@ def configure_logging():
     return root_logger
 
 
+atexit.register(_stop_listener)
+
+
 # Helper function to get a logger for a module
 def get_logger(name):
     """Get a logger with the specified name."""
@@ -1,15 +1,91 @@
 """Database initialization script."""
 
+from typing import NamedTuple, Union
+
 from sqlalchemy import text
-from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.logging_config import get_logger
 from app.db.base import Base
 from app.db.session import engine
 
 logger = get_logger(__name__)
 
+# Shared with the db_scripts so the check lives in one place
+_Q_VECTOR_EXTENSION = text(
+    "SELECT 1 FROM pg_extension WHERE extname = :extname"
+).bindparams(extname="vector")
+
+_Q_CREATE_VECTOR_EXTENSION = text("CREATE EXTENSION IF NOT EXISTS vector")
+
+# Whether pgvector provides halfvec (0.7+), the type of an existing
+# embedding column (NULL if the chunk table doesn't exist yet), whether
+# chunks are deleted with their document by a cascading foreign key, and
+# whether the full-text column the text-search fallback queries exists
+_Q_SCHEMA_SUPPORT = text(
+    "SELECT to_regtype('halfvec') IS NOT NULL AS has_halfvec,"
+    " (SELECT udt_name FROM information_schema.columns"
+    " WHERE table_schema = current_schema() AND table_name = 'documentchunk'"
+    " AND column_name = 'embedding') AS embedding_type,"
+    " EXISTS (SELECT 1 FROM pg_constraint"
+    " WHERE conrelid = to_regclass('documentchunk')"
+    " AND conname = 'documentchunk_document_id_fkey'"
+    " AND confdeltype = 'c') AS has_cascade_delete,"
+    " EXISTS (SELECT 1 FROM information_schema.columns"
+    " WHERE table_schema = current_schema() AND table_name = 'documentchunk'"
+    " AND column_name = 'content_tsv') AS has_content_tsv"
+)
+
+# Planner row estimate for a table; cheap, unlike count(*)
+_Q_TABLE_ROW_ESTIMATE = text("SELECT reltuples FROM pg_class WHERE relname = :table")
+
+
+# Binary-quantized embedding (one bit per dimension) used by the two-stage
+# search; the query and its HNSW index must use exactly this expression
+BINARY_QUANTIZED_EMBEDDING = (
+    f"CAST(binary_quantize(embedding) AS bit({int(settings.EMBEDDING_DIMENSION)}))"
+)
+
+
+class DatabaseSchemaError(RuntimeError):
+    """Raised when an existing database schema doesn't match what the app needs."""
+
+
+class HNSWParams(NamedTuple):
+    """HNSW build (m, ef_construction) and query (ef_search) parameters."""
+
+    m: int
+    ef_construction: int
+    ef_search: int
+
+
+def hnsw_params(chunk_count: int) -> HNSWParams:
+    """
+    Pick HNSW parameters for a collection of chunk_count embeddings.
+
+    Larger graphs need more links per node and wider candidate lists to keep
+    recall up; small ones stay at pgvector's defaults.
+    """
+    if chunk_count < 100_000:
+        return HNSWParams(m=16, ef_construction=64, ef_search=40)
+    if chunk_count < 1_000_000:
+        return HNSWParams(m=24, ef_construction=128, ef_search=100)
+    return HNSWParams(m=32, ef_construction=200, ef_search=200)
+
+
+def estimate_rows(conn: Union[Connection, Session], table: str) -> int:
+    """Return the planner's row estimate for table (0 if never analyzed)."""
+    estimate = conn.execute(_Q_TABLE_ROW_ESTIMATE, {"table": table}).scalar()
+    return max(int(estimate or 0), 0)
+
+
+def pgvector_installed(conn: Union[Connection, Session]) -> bool:
+    """Return whether the pgvector extension is installed in conn's database."""
+    return conn.execute(_Q_VECTOR_EXTENSION).first() is not None
+
 
 def init_db() -> None:
     """
@@ -18,42 +94,53 @@ def init_db() -> None:
     try:
         logger.info("Starting database initialization")
 
-        # Create tables
-        logger.info("Creating database tables")
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables created successfully")
-
-        # Log database connection details
-        db_url = str(engine.url).replace(":*****@", "@")  # Hide password
-        logger.info(f"Database connection details: {db_url}")
-
-        # Check for pgvector extension
-        with engine.connect() as conn:
+        # Create tables on one connection/transaction
+        with engine.begin() as conn:
+            # The embedding column is a pgvector type, so the extension must
+            # exist before the tables are created
             try:
-                # Use text() to create a properly executable SQL statement
-                logger.debug("Checking for pgvector extension")
-                result = conn.execute(
-                    text(
-                        "SELECT EXISTS(SELECT 1 FROM pg_extension WHERE extname = 'vector')"
-                    )
+                with conn.begin_nested():
+                    conn.execute(_Q_CREATE_VECTOR_EXTENSION)
+            except DBAPIError as e:
+                logger.warning(f"Could not create pgvector extension: {str(e)}")
+
+            # Embeddings are stored as halfvec, so without pgvector 0.7+ (or
+            # with an embedding column from before the halfvec migration)
+            # neither table creation nor chunk inserts can work
+            support = conn.execute(_Q_SCHEMA_SUPPORT).one()
+            if not support.has_halfvec:
+                raise DatabaseSchemaError(
+                    "pgvector 0.7 or later is required: install it on the"
+                    " PostgreSQL server and run 'CREATE EXTENSION vector;'"
                 )
-                if result.scalar():
-                    logger.info("pgvector extension is installed")
-                else:
-                    logger.warning(
-                        "pgvector extension is not installed. Vector search will not work properly."
+            if support.embedding_type not in (None, "halfvec"):
+                raise DatabaseSchemaError(
+                    f"documentchunk.embedding is a {support.embedding_type}"
+                    " column; convert it to halfvec with"
+                    " 'python db_scripts/migrate_embedding_to_vector.py'"
+                )
+            # create_all doesn't add constraints or columns to an existing
+            # table; deleting a document relies on the cascade to remove its
+            # chunks, and the text-search fallback on content_tsv
+            if support.embedding_type is not None:
+                if not support.has_cascade_delete:
+                    raise DatabaseSchemaError(
+                        "documentchunk has no cascading foreign key to document;"
+                        " add it with 'python db_scripts/upgrade_chunk_table.py'"
                     )
-                    logger.info(
-                        "You can install pgvector with 'CREATE EXTENSION vector;' in your PostgreSQL database."
+                if not support.has_content_tsv:
+                    raise DatabaseSchemaError(
+                        "documentchunk has no content_tsv full-text column;"
+                        " add it with 'python db_scripts/upgrade_chunk_table.py'"
                     )
-            except ProgrammingError as e:
-                logger.warning(f"Error checking pgvector extension: {str(e)}")
-                logger.warning(
-                    "pgvector extension not found. Vector search may not work properly."
-                )
-                logger.info(
-                    "You can install pgvector with 'CREATE EXTENSION vector;' in your PostgreSQL database."
-                )
+
+            logger.info("Creating database tables")
+            Base.metadata.create_all(bind=conn)
+            logger.info("Database tables created successfully")
+
+            # Log database connection details
+            db_url = str(engine.url).replace(":*****@", "@")  # Hide password
+            logger.info(f"Database connection details: {db_url}")
 
         logger.info("Database initialization completed successfully")
     except Exception as e:
@@ -1,27 +1,63 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api.router import api_router
-from app.core.config import settings
+from app.core.config import get_settings
 from app.core.logging_config import configure_logging, get_logger
-from app.db.init_db import init_db
+from app.db.init_db import DatabaseSchemaError, init_db
+from app.ml.provider import close_model_provider
 
 # Configure logging
 configure_logging()
 logger = get_logger(__name__)
 
+settings = get_settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Initialize the database before the app starts serving requests, and
+    close the model provider's connections on shutdown.
+    """
+    try:
+        logger.info("Initializing database...")
+        # init_db is blocking; its schema check also leaves a connection in
+        # the pool, so the first request doesn't pay for the connect
+        await asyncio.to_thread(init_db)
+        logger.info("Database initialized successfully")
+    except DatabaseSchemaError as e:
+        # The database is reachable but can't store embeddings; every upload
+        # and search would fail, so refuse to start
+        logger.critical(f"Database schema is not usable: {str(e)}")
+        raise
+    except Exception as e:
+        logger.error(f"Failed to initialize database: {str(e)}", exc_info=True)
+        # Don't raise exception here to allow app to start even if DB init fails
+        # This allows the app to provide meaningful error messages through the API
+    yield
+    await close_model_provider()
+
+
 app = FastAPI(
-    title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    title=settings.PROJECT_NAME,
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
-if settings.BACKEND_CORS_ORIGINS:
-    logger.info(f"Setting CORS with origins: {settings.BACKEND_CORS_ORIGINS}")
+cors_origins = settings.cors_origins_str
+if cors_origins:
+    logger.info("Setting CORS with origins: %s", cors_origins)
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
+        allow_origins=cors_origins,
         allow_origin_regex=r"https?://(localhost|127\.0\.0\.1)(:[0-9]+)?",
         allow_credentials=True,
         allow_methods=["*"],
@@ -32,19 +68,6 @@ if settings.BACKEND_CORS_ORIGINS:
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
-@app.on_event("startup")
-async def startup_db_client():
-    """Initialize database on app startup."""
-    try:
-        logger.info("Initializing database...")
-        init_db()
-        logger.info("Database initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize database: {str(e)}", exc_info=True)
-        # Don't raise exception here to allow app to start even if DB init fails
-        # This allows the app to provide meaningful error messages through the API
-
-
 @app.get("/")
 def root():
     logger.debug("Root endpoint accessed")
@@ -1,14 +1,32 @@
 """Base classes for model providers."""
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.logging_config import get_logger
+from app.ml.cache import embedding_cache_key
+
+logger = get_logger(__name__)
+
+
+class EmbeddingError(Exception):
+    """Raised when a provider cannot produce an embedding for a text."""
 
 
 class ModelProvider(ABC):
-    """Base class for model providers."""
+    """
+    Base class for model providers.
+
+    The batch embedding helpers below expect a provider to set ``dimension``,
+    ``embedding_model``, ``EMBEDDING_BATCH_SIZE`` and an LRUEmbeddingCache
+    as ``_cache``.
+    """
 
     @abstractmethod
-    def get_embedding(self, text: str) -> List[float]:
+    def get_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a given text.
 
@@ -16,12 +34,12 @@ class ModelProvider(ABC):
             text: The text to generate an embedding for
 
         Returns:
-            A list of floats representing the embedding vector
+            A float32 array of shape (dim,) holding the embedding vector
         """
         pass
 
     @abstractmethod
-    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for multiple texts.
 
@@ -29,7 +47,7 @@ class ModelProvider(ABC):
             texts: List of texts to generate embeddings for
 
         Returns:
-            List of embedding vectors
+            A float32 array of shape (len(texts), dim), one row per text
         """
         pass
 
@@ -40,6 +58,9 @@ class ModelProvider(ABC):
         context: str = None,
         temperature: float = 0.7,
         max_tokens: int = 500,
+        *,
+        query_embedding: Optional[np.ndarray] = None,
+        no_cache: bool = False,
     ) -> Dict[str, Any]:
         """
         Generate a completion response based on the prompt and optional context.
@@ -49,8 +70,154 @@ class ModelProvider(ABC):
             context: Optional context to inform the completion
             temperature: Controls randomness of output (0.0-1.0)
             max_tokens: Maximum number of tokens to generate
+            query_embedding: Embedding of the prompt, if the caller already has
+                one (e.g. from retrieval), so it isn't computed again
+            no_cache: Bypass any completion cache the provider keeps, e.g. for
+                sensitive prompts
 
         Returns:
             Dictionary with completion text and any additional metadata
         """
         pass
+
+    async def get_embedding_async(self, text: str) -> np.ndarray:
+        """
+        Async variant of get_embedding.
+
+        Providers with a native async client should override this; the
+        default runs the blocking call in a worker thread so it never stalls
+        the event loop.
+        """
+        return await asyncio.to_thread(self.get_embedding, text)
+
+    async def get_embeddings_async(self, texts: List[str]) -> np.ndarray:
+        """Async variant of get_embeddings; see get_embedding_async."""
+        return await asyncio.to_thread(self.get_embeddings, texts)
+
+    async def generate_completion_async(
+        self,
+        prompt: str,
+        context: str = None,
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        *,
+        query_embedding: Optional[np.ndarray] = None,
+        no_cache: bool = False,
+    ) -> Dict[str, Any]:
+        """Async variant of generate_completion; see get_embedding_async."""
+        return await asyncio.to_thread(
+            self.generate_completion,
+            prompt,
+            context,
+            temperature,
+            max_tokens,
+            query_embedding=query_embedding,
+            no_cache=no_cache,
+        )
+
+    def generate_completion_stream(
+        self,
+        prompt: str,
+        context: str = None,
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        *,
+        query_embedding: Optional[np.ndarray] = None,
+        no_cache: bool = False,
+    ) -> Iterator[str]:
+        """
+        Stream a completion as text fragments as they are generated.
+
+        Providers whose API supports streaming should override this; the
+        default yields the whole completion from generate_completion at once.
+        """
+        yield self.generate_completion(
+            prompt,
+            context,
+            temperature,
+            max_tokens,
+            query_embedding=query_embedding,
+            no_cache=no_cache,
+        ).get("text", "")
+
+    async def aclose(self) -> None:
+        """
+        Release the provider's clients and worker threads.
+
+        Called once at application shutdown; the default has nothing to close.
+        """
+
+    @staticmethod
+    def _deduplicate(texts: List[str]) -> Optional[Tuple[List[str], List[int]]]:
+        """
+        Collapse repeated texts, or return None if they are all distinct.
+
+        Repeated chunks (headers, footers, TOC lines) are embedded once and
+        scattered back to every position they occur at.
+        """
+        unique: Dict[str, int] = {}
+        positions = [unique.setdefault(text, len(unique)) for text in texts]
+        if len(unique) == len(texts):
+            return None
+        logger.debug(
+            "Embedding %d unique of %d texts (%.0f%% duplicates)",
+            len(unique),
+            len(texts),
+            100 * (1 - len(unique) / len(texts)),
+        )
+        return list(unique), positions
+
+    def _lookup_embeddings(
+        self, texts: List[str]
+    ) -> Tuple[np.ndarray, List[Any], List[List[int]]]:
+        """
+        Fill cached rows and split the uncached ones into request batches.
+
+        Returns:
+            The embedding matrix, the cache key per text, and batches of
+            row indices that still need to be requested
+        """
+        # Every row is either filled from the cache or by a batch later on
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        keys = [embedding_cache_key(self.embedding_model, text) for text in texts]
+        missing = []
+        for i, key in enumerate(keys):
+            cached = self._cache.get(key)
+            if cached is not None:
+                embeddings[i] = cached
+            else:
+                missing.append(i)
+
+        batches = self._pack_batches([texts[i] for i in missing], missing)
+        return embeddings, keys, batches
+
+    def _pack_batches(self, texts: List[str], indices: List[int]) -> List[List[int]]:
+        """
+        Group indices into request batches of at most EMBEDDING_BATCH_SIZE.
+
+        Providers with other request limits (e.g. a token budget) override
+        this; texts are those at indices, in the same order.
+        """
+        size = self.EMBEDDING_BATCH_SIZE
+        return [indices[i : i + size] for i in range(0, len(indices), size)]
+
+    def _store_embeddings(
+        self,
+        embeddings: np.ndarray,
+        keys: List[Any],
+        batches: List[List[int]],
+        results: Iterable[Sequence[Sequence[float]]],
+    ) -> None:
+        """Write batch results into their rows and cache the real ones."""
+        for batch, vectors in zip(batches, results):
+            embeddings[batch] = vectors
+            for i in batch:
+                self._cache_embedding(keys[i], embeddings[i].copy())
+
+    def _cache_embedding(self, key: Any, embedding: np.ndarray) -> np.ndarray:
+        """Cache a real embedding; zero-vector fallbacks are never cached."""
+        if embedding.any():
+            # Cached arrays are shared, so make them read-only
+            embedding.flags.writeable = False
+            self._cache.set(key, embedding)
+        return embedding
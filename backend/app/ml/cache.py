@@ -0,0 +1,110 @@
+"""In-process caches for model provider results."""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+import numpy as np
+
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def embedding_cache_key(model: str, text: str) -> Tuple[str, bytes]:
+    """Build a cache key for a text embedded with a given model."""
+    return model, hashlib.sha256(text.encode()).digest()
+
+
+class LRUEmbeddingCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL.
+
+    Entries are evicted least-recently-used first once capacity is reached,
+    and treated as missing once they are older than ttl seconds.
+    """
+
+    def __init__(self, capacity: int = 1024, ttl: float = 3600.0):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class RedisEmbeddingCache:
+    """
+    Embedding cache in Redis, shared by every worker process.
+
+    Vectors are stored as raw float32 bytes with a TTL. Redis errors are
+    logged and treated as misses, and the client times out quickly, so an
+    unreachable Redis only costs the embedding call it was meant to save.
+    All-zero vectors (how some providers report a failed call) are never
+    stored or returned, so one failure can't be served to every worker.
+    """
+
+    def __init__(self, url: str, ttl: int = 3600, prefix: str = "emb"):
+        import redis
+
+        self._errors = redis.RedisError
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=0.1, socket_connect_timeout=0.1
+        )
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, model: str, text: str) -> bytes:
+        digest = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+        return f"{self.prefix}:{model}:{digest}".encode()
+
+    def get(self, model: str, text: str) -> Optional[np.ndarray]:
+        """Return the cached embedding of text, or None on a miss or error."""
+        try:
+            raw = self._client.get(self._key(model, text))
+        except self._errors as e:
+            logger.warning(f"Redis embedding cache unavailable: {e}")
+            return None
+        if raw is None:
+            return None
+        # frombuffer over bytes is read-only, like the in-process cache entries
+        embedding = np.frombuffer(raw, dtype=np.float32)
+        return embedding if embedding.any() else None
+
+    def set(self, model: str, text: str, embedding: np.ndarray) -> None:
+        """Store the embedding of text for ttl seconds, unless it is all zeros."""
+        if not np.any(embedding):
+            return
+        try:
+            self._client.setex(
+                self._key(model, text),
+                self.ttl,
+                np.asarray(embedding, dtype=np.float32).tobytes(),
+            )
+        except self._errors as e:
+            logger.warning(f"Redis embedding cache unavailable: {e}")
@@ -1,11 +1,23 @@
 """HuggingFace model provider implementation using HuggingFace API."""
 
-from typing import Any, Dict, List
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
+import httpx
+import numpy as np
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from app.core.config import settings
-from app.ml.base import ModelProvider
+from app.core.logging_config import get_logger
+from app.ml.base import EmbeddingError, ModelProvider
+from app.ml.cache import LRUEmbeddingCache, embedding_cache_key
+
+logger = get_logger(__name__)
 
 
 class HuggingFaceProvider(ModelProvider):
@@ -16,6 +28,10 @@ class HuggingFaceProvider(ModelProvider):
     embeddings and completions.
     """
 
+    # Texts per embeddings request, and how many requests may be in flight
+    EMBEDDING_BATCH_SIZE = 32
+    MAX_CONCURRENT_BATCHES = 4
+
     def __init__(self):
         """Initialize the HuggingFace provider."""
         self.api_key = settings.HUGGINGFACE_API_KEY
@@ -25,7 +41,168 @@ class HuggingFaceProvider(ModelProvider):
         self.headers = {"Authorization": f"Bearer {self.api_key}"}
         self.dimension = settings.EMBEDDING_DIMENSION
 
-    def get_embedding(self, text: str) -> List[float]:
+        # Endpoint URLs and default generation parameters are fixed per instance
+        self._embed_url = f"{self.api_url}/{self.embedding_model}"
+        self._complete_url = f"{self.api_url}/{self.completion_model}"
+        self._completion_params_template = {
+            "temperature": 0.7,
+            "max_new_tokens": 500,
+            "return_full_text": False,
+        }
+
+        # Pooled keep-alive session shared by embedding and completion calls,
+        # so each request doesn't pay for a new TCP + TLS handshake
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset({"POST"}),
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("https://", adapter)
+        # (connect, read) timeouts in seconds
+        self.timeout = (3.05, 60)
+
+        # Async client for callers on the event loop
+        self.aclient = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=httpx.Timeout(60.0, connect=3.0),
+            limits=httpx.Limits(max_connections=32),
+        )
+        # Repeated texts (re-uploads, common queries) skip the API call
+        self._cache = LRUEmbeddingCache(1024, 3600)
+        # Worker threads for concurrent embedding batches
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.MAX_CONCURRENT_BATCHES,
+            thread_name_prefix="hf-embed",
+        )
+
+    def _parse_embedding(self, response: Any) -> np.ndarray:
+        """Turn a single-text embedding response into a float32 vector."""
+        if response.status_code == 200:
+            # Extract embeddings from response; orjson parses the float arrays
+            # several times faster than the stdlib json behind response.json()
+            embedding = orjson.loads(response.content)
+
+            # Handle different response formats
+            if isinstance(embedding, list) and len(embedding) > 0:
+                if isinstance(embedding[0], list):
+                    # Some models return a list of sentence embeddings
+                    return np.asarray(embedding[0], dtype=np.float32)
+                else:
+                    # Some models return a single embedding vector
+                    return np.asarray(embedding, dtype=np.float32)
+
+            logger.warning("Unexpected embedding format: %s", embedding)
+            raise EmbeddingError("Embedding response contained no vector")
+        else:
+            # Only read the (possibly large) body if the record will be emitted
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning(
+                    "Error generating embedding (HTTP %s): %s",
+                    response.status_code,
+                    response.text,
+                )
+            raise EmbeddingError(f"Embedding request failed: {response.status_code}")
+
+    def _parse_embeddings(self, response: Any, count: int) -> Optional[np.ndarray]:
+        """
+        Turn a batch embedding response into a (count, dim) float32 array.
+
+        Returns None when the batch failed and callers should fall back to
+        embedding each text individually.
+        """
+        if response.status_code == 200:
+            data = orjson.loads(response.content)
+            if isinstance(data, list) and len(data) == count:
+                # Like get_embedding, unwrap models that nest each vector
+                return np.asarray(
+                    [
+                        vec[0] if vec and isinstance(vec[0], list) else vec
+                        for vec in data
+                    ],
+                    dtype=np.float32,
+                )
+            logger.warning("Unexpected batch embedding format for %s texts", count)
+        else:
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning(
+                    "Error generating batch embeddings (HTTP %s): %s",
+                    response.status_code,
+                    response.text,
+                )
+        return None
+
+    def _completion_payload(
+        self, prompt: str, context: str, temperature: float, max_tokens: int
+    ) -> Dict[str, Any]:
+        """Build the text-generation request body."""
+        user_prompt = prompt
+
+        if context:
+            user_prompt = f"Context:\n{context}\n\nQuestion: {prompt}"
+
+        # The template is only read when serialized, so the default case
+        # can share it instead of building a new dict per call
+        params = self._completion_params_template
+        if (temperature, max_tokens) != (0.7, 500):
+            params = {
+                **params,
+                "temperature": temperature,
+                "max_new_tokens": max_tokens,
+            }
+
+        return {"inputs": user_prompt, "parameters": params}
+
+    def _parse_completion(self, response: Any) -> Dict[str, Any]:
+        """Turn a text-generation response into the completion result dict."""
+        if response.status_code == 200:
+            data = orjson.loads(response.content)
+
+            # Handle different response formats
+            completion_text = ""
+            if isinstance(data, list) and len(data) > 0:
+                if "generated_text" in data[0]:
+                    completion_text = data[0]["generated_text"]
+                else:
+                    completion_text = data[0]
+            elif isinstance(data, dict) and "generated_text" in data:
+                completion_text = data["generated_text"]
+            else:
+                completion_text = str(data)
+
+            return {
+                "text": completion_text,
+                "model": self.completion_model,
+                "token_usage": {},  # HuggingFace doesn't provide token usage stats
+            }
+        else:
+            # Return error message if API call fails
+            error_msg = f"Error: {response.text}"
+            logger.warning("Completion request failed: %s", error_msg)
+            return self._completion_error(error_msg)
+
+    def _completion_error(self, error: str) -> Dict[str, Any]:
+        """Build the completion result returned when a request fails."""
+        return {
+            "text": f"Sorry, I couldn't process your request due to a technical issue. {error}",
+            "model": self.completion_model,
+            "token_usage": {},
+        }
+
+    async def aclose(self) -> None:
+        """Close the HTTP clients and stop the embedding worker threads."""
+        await self.aclient.aclose()
+        self.session.close()
+        self._executor.shutdown(wait=False)
+
+    def get_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a given text using HuggingFace.
 
@@ -33,41 +210,47 @@ class HuggingFaceProvider(ModelProvider):
             text: The text to generate an embedding for
 
         Returns:
-            A list of floats representing the embedding vector
+            A float32 array holding the embedding vector
+
+        Raises:
+            EmbeddingError: If the API doesn't return an embedding
         """
+        key = embedding_cache_key(self.embedding_model, text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
         try:
             # Call HuggingFace embedding API
-            response = requests.post(
-                f"{self.api_url}/{self.embedding_model}",
-                headers=self.headers,
+            response = self.session.post(
+                self._embed_url,
+                timeout=self.timeout,
                 json={"inputs": text},
             )
+            return self._cache_embedding(key, self._parse_embedding(response))
+        except EmbeddingError:
+            raise
+        except Exception as e:
+            logger.error("Exception in get_embedding: %s", e, exc_info=True)
+            raise EmbeddingError(str(e)) from e
 
-            if response.status_code == 200:
-                # Extract embeddings from response
-                embedding = response.json()
-
-                # Handle different response formats
-                if isinstance(embedding, list) and len(embedding) > 0:
-                    if isinstance(embedding[0], list):
-                        # Some models return a list of sentence embeddings
-                        return embedding[0]
-                    else:
-                        # Some models return a single embedding vector
-                        return embedding
-
-                # Fallback for unexpected response format
-                print(f"Unexpected embedding format: {embedding}")
-                return [0.0] * self.dimension
-            else:
-                # Fallback to a zero vector if API call fails
-                print(f"Error generating embedding: {response.text}")
-                return [0.0] * self.dimension
+    async def get_embedding_async(self, text: str) -> np.ndarray:
+        """Async variant of get_embedding using the shared httpx client."""
+        key = embedding_cache_key(self.embedding_model, text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self.aclient.post(self._embed_url, json={"inputs": text})
+            return self._cache_embedding(key, self._parse_embedding(response))
+        except EmbeddingError:
+            raise
         except Exception as e:
-            print(f"Exception in get_embedding: {str(e)}")
-            return [0.0] * self.dimension
+            logger.error("Exception in get_embedding_async: %s", e, exc_info=True)
+            raise EmbeddingError(str(e)) from e
 
-    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for multiple texts using HuggingFace.
 
@@ -75,10 +258,123 @@ class HuggingFaceProvider(ModelProvider):
             texts: List of texts to generate embeddings for
 
         Returns:
-            List of embedding vectors
+            A float32 array with one embedding vector per row
+
+        Raises:
+            EmbeddingError: If any uncached text can't be embedded
+        """
+        deduplicated = self._deduplicate(texts)
+        if deduplicated is not None:
+            unique, positions = deduplicated
+            return self.get_embeddings(unique)[positions]
+
+        embeddings, keys, batches = self._lookup_embeddings(texts)
+        if not batches:
+            return embeddings
+
+        # Send the uncached texts in fixed-size batches, concurrently when
+        # there is more than one; results come back in batch order
+        batch_texts = [[texts[i] for i in batch] for batch in batches]
+        if len(batches) == 1:
+            results = [self._embed_batch(batch_texts[0])]
+        else:
+            results = self._executor.map(self._embed_batch, batch_texts)
+
+        self._store_embeddings(embeddings, keys, batches, results)
+        return embeddings
+
+    async def get_embeddings_async(self, texts: List[str]) -> np.ndarray:
+        """
+        Async variant of get_embeddings.
+
+        Uncached batches, split batches and the per-text fallback run
+        concurrently.
+        """
+        deduplicated = self._deduplicate(texts)
+        if deduplicated is not None:
+            unique, positions = deduplicated
+            return (await self.get_embeddings_async(unique))[positions]
+
+        embeddings, keys, batches = self._lookup_embeddings(texts)
+        if not batches:
+            return embeddings
+
+        results = await asyncio.gather(
+            *(self._embed_batch_async([texts[i] for i in batch]) for batch in batches)
+        )
+        self._store_embeddings(embeddings, keys, batches, results)
+        return embeddings
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Request embeddings for one batch of texts.
+
+        Args:
+            texts: The texts in this batch
+
+        Returns:
+            A float32 array with one embedding vector per row
+
+        Raises:
+            EmbeddingError: If a text in the batch can't be embedded on its own
         """
-        # For simplicity, we'll process each text individually
-        return [self.get_embedding(text) for text in texts]
+        try:
+            # The feature-extraction endpoint accepts a list of inputs, so embed
+            # the whole batch in one request
+            response = self.session.post(
+                self._embed_url,
+                timeout=self.timeout,
+                json={"inputs": texts},
+            )
+
+            if response.status_code == 413 and len(texts) > 1:
+                # Payload too large: split the batch in half and retry each part
+                middle = len(texts) // 2
+                return np.concatenate(
+                    [
+                        self._embed_batch(texts[:middle]),
+                        self._embed_batch(texts[middle:]),
+                    ]
+                )
+
+            embeddings = self._parse_embeddings(response, len(texts))
+            if embeddings is not None:
+                return embeddings
+        except EmbeddingError:
+            # A split half already fell back to single texts and failed
+            raise
+        except Exception as e:
+            logger.error("Exception in get_embeddings: %s", e, exc_info=True)
+
+        # Fall back to embedding each text individually; a text that fails
+        # on its own raises EmbeddingError
+        return np.stack([self.get_embedding(text) for text in texts])
+
+    async def _embed_batch_async(self, texts: List[str]) -> np.ndarray:
+        """Async variant of _embed_batch using the shared httpx client."""
+        try:
+            response = await self.aclient.post(self._embed_url, json={"inputs": texts})
+
+            if response.status_code == 413 and len(texts) > 1:
+                middle = len(texts) // 2
+                halves = await asyncio.gather(
+                    self._embed_batch_async(texts[:middle]),
+                    self._embed_batch_async(texts[middle:]),
+                )
+                return np.concatenate(halves)
+
+            embeddings = self._parse_embeddings(response, len(texts))
+            if embeddings is not None:
+                return embeddings
+        except EmbeddingError:
+            # A split half already fell back to single texts and failed
+            raise
+        except Exception as e:
+            logger.error("Exception in get_embeddings_async: %s", e, exc_info=True)
+
+        return np.stack(
+            await asyncio.gather(*(self.get_embedding_async(text) for text in texts))
+        )
 
     def generate_completion(
         self,
@@ -86,6 +382,9 @@ class HuggingFaceProvider(ModelProvider):
         context: str = None,
         temperature: float = 0.7,
         max_tokens: int = 500,
+        *,
+        query_embedding: Optional[np.ndarray] = None,
+        no_cache: bool = False,
     ) -> Dict[str, Any]:
         """
         Generate a completion response based on the prompt and optional context using HuggingFace.
@@ -95,67 +394,46 @@ class HuggingFaceProvider(ModelProvider):
             context: Optional context to inform the completion
             temperature: Controls randomness of output (0.0-1.0)
             max_tokens: Maximum number of tokens to generate
+            query_embedding: Unused; HuggingFace completions are not cached
+            no_cache: Unused, for the same reason
 
         Returns:
             Dictionary with completion text and metadata
         """
         try:
-            user_prompt = prompt
-
-            if context:
-                user_prompt = f"Context:\n{context}\n\nQuestion: {prompt}"
-
             # Prepare the payload for the model
-            payload = {
-                "inputs": user_prompt,
-                "parameters": {
-                    "temperature": temperature,
-                    "max_new_tokens": max_tokens,
-                    "return_full_text": False,
-                },
-            }
+            payload = self._completion_payload(prompt, context, temperature, max_tokens)
 
             # Call HuggingFace completion API
-            response = requests.post(
-                f"{self.api_url}/{self.completion_model}",
-                headers=self.headers,
+            response = self.session.post(
+                self._complete_url,
+                timeout=self.timeout,
                 json=payload,
             )
+            return self._parse_completion(response)
+        except Exception as e:
+            error = str(e)
+            logger.error("Exception in generate_completion: %s", error, exc_info=True)
+            return self._completion_error(error)
 
-            if response.status_code == 200:
-                data = response.json()
-
-                # Handle different response formats
-                completion_text = ""
-                if isinstance(data, list) and len(data) > 0:
-                    if "generated_text" in data[0]:
-                        completion_text = data[0]["generated_text"]
-                    else:
-                        completion_text = data[0]
-                elif isinstance(data, dict) and "generated_text" in data:
-                    completion_text = data["generated_text"]
-                else:
-                    completion_text = str(data)
-
-                return {
-                    "text": completion_text,
-                    "model": self.completion_model,
-                    "token_usage": {},  # HuggingFace doesn't provide token usage stats
-                }
-            else:
-                # Return error message if API call fails
-                error_msg = f"Error: {response.text}"
-                print(error_msg)
-                return {
-                    "text": f"Sorry, I couldn't process your request due to a technical issue. {error_msg}",
-                    "model": self.completion_model,
-                    "token_usage": {},
-                }
+    async def generate_completion_async(
+        self,
+        prompt: str,
+        context: str = None,
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        *,
+        query_embedding: Optional[np.ndarray] = None,
+        no_cache: bool = False,
+    ) -> Dict[str, Any]:
+        """Async variant of generate_completion using the shared httpx client."""
+        try:
+            payload = self._completion_payload(prompt, context, temperature, max_tokens)
+            response = await self.aclient.post(self._complete_url, json=payload)
+            return self._parse_completion(response)
         except Exception as e:
             error = str(e)
-            print(f"Exception in generate_completion: {error}")
-            return {
-                "text": f"Sorry, I couldn't process your request due to a technical issue. {error}",
-                "model": self.completion_model,
-                "token_usage": {},
-            }
+            logger.error(
+                "Exception in generate_completion_async: %s", error, exc_info=True
+            )
+            return self._completion_error(error)
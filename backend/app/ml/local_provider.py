@@ -1,14 +1,24 @@
 """Local model provider implementation using locally deployed models."""
 
-import json
+import asyncio
 import os
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Union
 
+import httpx
 import numpy as np
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from app.core.config import settings
-from app.ml.base import ModelProvider
+from app.core.logging_config import get_logger
+from app.ml.base import EmbeddingError, ModelProvider
+from app.ml.cache import LRUEmbeddingCache, embedding_cache_key
+from app.ml.semantic_cache import SemanticCompletionCache
+
+logger = get_logger(__name__)
 
 
 class LocalProvider(ModelProvider):
@@ -20,6 +30,10 @@ class LocalProvider(ModelProvider):
     text-embeddings-inference, or similar.
     """
 
+    # Texts per embeddings request, and how many requests may be in flight
+    EMBEDDING_BATCH_SIZE = 64
+    MAX_CONCURRENT_BATCHES = 5
+
     def __init__(self):
         """Initialize the local model provider."""
         self.server_url = settings.LOCAL_MODEL_SERVER_URL
@@ -28,8 +42,51 @@ class LocalProvider(ModelProvider):
         self.embedding_model = settings.LOCAL_EMBEDDING_MODEL
         self.completion_model = settings.LOCAL_COMPLETION_MODEL
         self.dimension = settings.EMBEDDING_DIMENSION
+        # Repeated texts (re-uploads, common queries) skip the API call
+        self._cache = LRUEmbeddingCache(1024, 3600)
+        # Paraphrased repeat questions over the same context reuse the answer
+        self._completion_cache = SemanticCompletionCache(self.get_embedding)
+
+        # Pooled keep-alive session shared by embedding and completion calls
+        self.session = requests.Session()
+        # Request bodies are pre-serialized with orjson
+        self.session.headers["Content-Type"] = "application/json"
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=[429, 502, 503, 504],
+                allowed_methods=frozenset({"POST"}),
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # (connect, read) timeouts in seconds
+        self.timeout = (3.05, 60)
+        # Worker threads for concurrent embedding batches; 429/503 responses
+        # are retried by the adapter, which honors Retry-After
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.MAX_CONCURRENT_BATCHES,
+            thread_name_prefix="local-embed",
+        )
+        # Async client for callers on the event loop; batches fan out over it
+        # with asyncio.gather instead of worker threads
+        self.aclient = httpx.AsyncClient(
+            headers={"Content-Type": "application/json"},
+            timeout=httpx.Timeout(60.0, connect=3.0),
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        )
 
-    def get_embedding(self, text: str) -> List[float]:
+    async def aclose(self) -> None:
+        """Close the HTTP clients and stop the embedding worker threads."""
+        await self.aclient.aclose()
+        self.session.close()
+        self._executor.shutdown(wait=False)
+
+    def get_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a given text using local model.
 
@@ -37,29 +94,70 @@ class LocalProvider(ModelProvider):
             text: The text to generate an embedding for
 
         Returns:
-            A list of floats representing the embedding vector
+            A float32 array holding the embedding vector
+
+        Raises:
+            EmbeddingError: If the model server doesn't return an embedding
         """
+        key = embedding_cache_key(self.embedding_model, text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
         try:
             # Call local embedding model API
-            response = requests.post(
+            response = self.session.post(
                 f"{self.server_url}/embeddings",
-                json={"input": text, "model": self.embedding_model},
+                timeout=self.timeout,
+                data=self._embedding_body(text),
             )
+            return self._parse_embedding(response, key)
+        except EmbeddingError:
+            raise
+        except Exception as e:
+            logger.exception("Exception in get_embedding")
+            raise EmbeddingError(str(e)) from e
 
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("data", [{}])[0].get(
-                    "embedding", [0.0] * self.dimension
-                )
-            else:
-                # Fallback to a zero vector if API call fails
-                print(f"Error generating embedding: {response.text}")
-                return [0.0] * self.dimension
+    async def get_embedding_async(self, text: str) -> np.ndarray:
+        """Async variant of get_embedding using the shared httpx client."""
+        key = embedding_cache_key(self.embedding_model, text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self.aclient.post(
+                f"{self.server_url}/embeddings",
+                content=self._embedding_body(text),
+            )
+            return self._parse_embedding(response, key)
+        except EmbeddingError:
+            raise
         except Exception as e:
-            print(f"Exception in get_embedding: {str(e)}")
-            return [0.0] * self.dimension
+            logger.exception("Exception in get_embedding_async")
+            raise EmbeddingError(str(e)) from e
+
+    def _parse_embedding(self, response: Any, key: Any) -> np.ndarray:
+        """Turn a single-text embedding response into a vector, caching it."""
+        if response.status_code == 200:
+            data = orjson.loads(response.content)
+            embedding = data.get("data", [{}])[0].get("embedding")
+            if embedding is None:
+                raise EmbeddingError("Embedding response contained no vector")
+            embedding = np.asarray(embedding, dtype=np.float32)
+            # Cached arrays are shared, so make them read-only
+            embedding.flags.writeable = False
+            self._cache.set(key, embedding)
+            return embedding
+        else:
+            logger.error(
+                "Error generating embedding (HTTP %s): %s",
+                response.status_code,
+                response.text,
+            )
+            raise EmbeddingError(f"Embedding request failed: {response.status_code}")
 
-    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for multiple texts using local model.
 
@@ -67,37 +165,111 @@ class LocalProvider(ModelProvider):
             texts: List of texts to generate embeddings for
 
         Returns:
-            List of embedding vectors
+            A float32 array with one embedding vector per row
+
+        Raises:
+            EmbeddingError: If any uncached text can't be embedded
+        """
+        deduplicated = self._deduplicate(texts)
+        if deduplicated is not None:
+            unique, positions = deduplicated
+            return self.get_embeddings(unique)[positions]
+
+        embeddings, keys, batches = self._lookup_embeddings(texts)
+        if not batches:
+            return embeddings
+
+        # Send the uncached texts in fixed-size batches, concurrently when
+        # there is more than one; results come back in batch order
+        batch_texts = [[texts[i] for i in batch] for batch in batches]
+        if len(batches) == 1:
+            results = [self._embed_batch(batch_texts[0])]
+        else:
+            results = self._executor.map(self._embed_batch, batch_texts)
+
+        self._store_embeddings(embeddings, keys, batches, results)
+        return embeddings
+
+    async def get_embeddings_async(self, texts: List[str]) -> np.ndarray:
+        """
+        Async variant of get_embeddings.
+
+        Uncached batches are requested concurrently with asyncio.gather.
+        """
+        deduplicated = self._deduplicate(texts)
+        if deduplicated is not None:
+            unique, positions = deduplicated
+            return (await self.get_embeddings_async(unique))[positions]
+
+        embeddings, keys, batches = self._lookup_embeddings(texts)
+        if not batches:
+            return embeddings
+
+        results = await asyncio.gather(
+            *(self._embed_batch_async([texts[i] for i in batch]) for batch in batches)
+        )
+        self._store_embeddings(embeddings, keys, batches, results)
+        return embeddings
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Request embeddings for one batch of texts.
+
+        Args:
+            texts: The texts in this batch
+
+        Returns:
+            One embedding per text
+
+        Raises:
+            EmbeddingError: If the request fails or returns too few vectors
         """
         try:
             # Call local embedding model API
-            response = requests.post(
+            response = self.session.post(
                 f"{self.server_url}/embeddings",
-                json={"input": texts, "model": self.embedding_model},
+                timeout=self.timeout,
+                data=self._embedding_body(texts),
             )
+            return self._parse_batch(response, len(texts))
+        except EmbeddingError:
+            raise
+        except Exception as e:
+            logger.exception("Exception in get_embeddings")
+            raise EmbeddingError(str(e)) from e
 
-            if response.status_code == 200:
-                data = response.json()
-                embeddings = [
-                    item.get("embedding", [0.0] * self.dimension)
-                    for item in data.get("data", [])
-                ]
-
-                # Ensure we have the right number of embeddings
-                if len(embeddings) != len(texts):
-                    # Fill in missing embeddings with zeros
-                    embeddings = embeddings + [[0.0] * self.dimension] * (
-                        len(texts) - len(embeddings)
-                    )
-
-                return embeddings
-            else:
-                # Fallback to zero vectors if API call fails
-                print(f"Error generating embeddings: {response.text}")
-                return [[0.0] * self.dimension for _ in texts]
+    async def _embed_batch_async(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of _embed_batch using the shared httpx client."""
+        try:
+            response = await self.aclient.post(
+                f"{self.server_url}/embeddings",
+                content=self._embedding_body(texts),
+            )
+            return self._parse_batch(response, len(texts))
+        except EmbeddingError:
+            raise
         except Exception as e:
-            print(f"Exception in get_embeddings: {str(e)}")
-            return [[0.0] * self.dimension for _ in texts]
+            logger.exception("Exception in get_embeddings_async")
+            raise EmbeddingError(str(e)) from e
+
+    @staticmethod
+    def _parse_batch(response: Any, count: int) -> List[List[float]]:
+        """Turn a batch embedding response into one embedding per text."""
+        if response.status_code == 200:
+            data = orjson.loads(response.content).get("data", [])
+            vectors = [item.get("embedding") for item in data[:count]]
+            if len(vectors) < count or any(vector is None for vector in vectors):
+                raise EmbeddingError(
+                    f"Embedding response is missing vectors for a batch of {count}"
+                )
+            return vectors
+        else:
+            logger.error(
+                "Error generating embeddings (HTTP %s): %s",
+                response.status_code,
+                response.text,
+            )
+            raise EmbeddingError(f"Embedding request failed: {response.status_code}")
 
     def generate_completion(
         self,
@@ -105,6 +277,9 @@ class LocalProvider(ModelProvider):
         context: str = None,
         temperature: float = 0.7,
         max_tokens: int = 500,
+        *,
+        query_embedding: Optional[np.ndarray] = None,
+        no_cache: bool = False,
     ) -> Dict[str, Any]:
         """
         Generate a completion response based on the prompt and optional context using local model.
@@ -114,54 +289,202 @@ class LocalProvider(ModelProvider):
             context: Optional context to inform the completion
             temperature: Controls randomness of output (0.0-1.0)
             max_tokens: Maximum number of tokens to generate
+            query_embedding: Embedding of the prompt from retrieval, reused for
+                the semantic cache lookup instead of embedding the prompt again
+            no_cache: Skip the semantic cache, e.g. for sensitive prompts
 
         Returns:
             Dictionary with completion text and metadata
         """
-        try:
-            system_prompt = "You are a helpful, accurate assistant."
-            user_prompt = prompt
-
-            if context:
-                user_prompt = f"Context:\n{context}\n\nQuestion: {prompt}"
+        namespace = SemanticCompletionCache.namespace(
+            self.completion_model, context, temperature, max_tokens
+        )
+        if not no_cache:
+            cached = self._completion_cache.get(prompt, namespace, query_embedding)
+            if cached is not None:
+                return cached
 
+        try:
             # Call local completion model API
-            response = requests.post(
+            response = self.session.post(
                 f"{self.server_url}/chat/completions",
-                json={
-                    "model": self.completion_model,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt},
-                    ],
-                    "temperature": temperature,
-                    "max_tokens": max_tokens,
-                },
+                timeout=self.timeout,
+                data=self._completion_body(prompt, context, temperature, max_tokens),
             )
+            completion = self._parse_completion(response)
+        except Exception as e:
+            error = str(e)
+            logger.exception("Exception in generate_completion")
+            return self._completion_error(error)
 
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "text": data.get("choices", [{}])[0]
-                    .get("message", {})
-                    .get("content", ""),
-                    "model": self.completion_model,
-                    "token_usage": data.get("usage", {}),
-                }
-            else:
-                # Return error message if API call fails
-                error_msg = f"Error: {response.text}"
-                print(error_msg)
-                return {
-                    "text": f"Sorry, I couldn't process your request due to a technical issue. {error_msg}",
-                    "model": self.completion_model,
-                    "token_usage": {},
-                }
+        # Only successful completions are cached
+        if response.status_code == 200 and not no_cache:
+            self._completion_cache.set(prompt, namespace, completion, query_embedding)
+        return completion
+
+    async def generate_completion_async(
+        self,
+        prompt: str,
+        context: str = None,
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        *,
+        query_embedding: Optional[np.ndarray] = None,
+        no_cache: bool = False,
+    ) -> Dict[str, Any]:
+        """Async variant of generate_completion using the shared httpx client."""
+        namespace = SemanticCompletionCache.namespace(
+            self.completion_model, context, temperature, max_tokens
+        )
+        # The semantic cache embeds the prompt synchronously, so keep it off
+        # the event loop
+        if not no_cache:
+            cached = await asyncio.to_thread(
+                self._completion_cache.get, prompt, namespace, query_embedding
+            )
+            if cached is not None:
+                return cached
+
+        try:
+            response = await self.aclient.post(
+                f"{self.server_url}/chat/completions",
+                content=self._completion_body(prompt, context, temperature, max_tokens),
+            )
+            completion = self._parse_completion(response)
         except Exception as e:
             error = str(e)
-            print(f"Exception in generate_completion: {error}")
-            return {
-                "text": f"Sorry, I couldn't process your request due to a technical issue. {error}",
+            logger.exception("Exception in generate_completion_async")
+            return self._completion_error(error)
+
+        if response.status_code == 200 and not no_cache:
+            await asyncio.to_thread(
+                self._completion_cache.set,
+                prompt,
+                namespace,
+                completion,
+                query_embedding,
+            )
+        return completion
+
+    def generate_completion_stream(
+        self,
+        prompt: str,
+        context: str = None,
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        *,
+        query_embedding: Optional[np.ndarray] = None,
+        no_cache: bool = False,
+    ) -> Iterator[str]:
+        """
+        Stream a completion as text fragments while the model generates it.
+
+        Takes the same arguments as generate_completion. The server's SSE
+        stream is read line by line; a semantic cache hit is yielded as a
+        single fragment, and a finished stream is cached.
+        """
+        namespace = SemanticCompletionCache.namespace(
+            self.completion_model, context, temperature, max_tokens
+        )
+        if not no_cache:
+            cached = self._completion_cache.get(prompt, namespace, query_embedding)
+            if cached is not None:
+                yield cached["text"]
+                return
+
+        parts = []
+        try:
+            with self.session.post(
+                f"{self.server_url}/chat/completions",
+                timeout=self.timeout,
+                data=self._completion_body(
+                    prompt, context, temperature, max_tokens, stream=True
+                ),
+                stream=True,
+            ) as response:
+                if response.status_code != 200:
+                    error_msg = f"Error: {response.text}"
+                    logger.error("Completion request failed: %s", error_msg)
+                    yield self._completion_error(error_msg)["text"]
+                    return
+
+                for line in response.iter_lines():
+                    if not line.startswith(b"data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == b"[DONE]":
+                        break
+                    choices = orjson.loads(data).get("choices") or [{}]
+                    content = choices[0].get("delta", {}).get("content")
+                    if content:
+                        parts.append(content)
+                        yield content
+        except Exception as e:
+            logger.exception("Exception in generate_completion_stream")
+            yield self._completion_error(str(e))["text"]
+            return
+
+        if not no_cache:
+            completion = {
+                "text": "".join(parts),
                 "model": self.completion_model,
                 "token_usage": {},
             }
+            self._completion_cache.set(prompt, namespace, completion, query_embedding)
+
+    def _completion_body(
+        self,
+        prompt: str,
+        context: str,
+        temperature: float,
+        max_tokens: int,
+        stream: bool = False,
+    ) -> bytes:
+        """Build the chat completion request body as JSON bytes."""
+        system_prompt = "You are a helpful, accurate assistant."
+        user_prompt = prompt
+
+        if context:
+            user_prompt = f"Context:\n{context}\n\nQuestion: {prompt}"
+
+        return orjson.dumps(
+            {
+                "model": self.completion_model,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "stream": stream,
+            }
+        )
+
+    def _embedding_body(self, texts: Union[str, List[str]]) -> bytes:
+        """Build the embeddings request body as JSON bytes."""
+        return orjson.dumps({"input": texts, "model": self.embedding_model})
+
+    def _parse_completion(self, response: Any) -> Dict[str, Any]:
+        """Turn a chat completion response into the completion result dict."""
+        if response.status_code == 200:
+            data = orjson.loads(response.content)
+            return {
+                "text": data.get("choices", [{}])[0]
+                .get("message", {})
+                .get("content", ""),
+                "model": self.completion_model,
+                "token_usage": data.get("usage", {}),
+            }
+        else:
+            # Return error message if API call fails
+            error_msg = f"Error: {response.text}"
+            logger.error("Completion request failed: %s", error_msg)
+            return self._completion_error(error_msg)
+
+    def _completion_error(self, error: str) -> Dict[str, Any]:
+        """Build the completion result returned when a request fails."""
+        return {
+            "text": f"Sorry, I couldn't process your request due to a technical issue. {error}",
+            "model": self.completion_model,
+            "token_usage": {},
+        }
@@ -1,24 +1,59 @@
 """OpenAI model provider implementation."""
 
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
+import numpy as np
 import tiktoken
 from openai import OpenAI
 
 from app.core.config import settings
+from app.core.logging_config import get_logger
 from app.ml.base import ModelProvider
+from app.ml.cache import LRUEmbeddingCache, embedding_cache_key
+from app.ml.semantic_cache import SemanticCompletionCache
+from app.utils.tokenizer import Tokenizer
+
+logger = get_logger(__name__)
 
 
 class OpenAIProvider(ModelProvider):
     """OpenAI model provider implementation."""
 
+    # Texts and tokens per embeddings request (the API rejects requests over
+    # 300k tokens), and how many requests may be in flight
+    EMBEDDING_BATCH_SIZE = 128
+    EMBEDDING_BATCH_TOKENS = 300_000
+    MAX_CONCURRENT_BATCHES = 5
+
     def __init__(self):
         """Initialize the OpenAI client."""
         self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
         self.embedding_model = settings.EMBEDDING_MODEL
         self.completion_model = settings.COMPLETION_MODEL
+        self.dimension = settings.EMBEDDING_DIMENSION
+        # text-embedding-3 models can return shortened vectors directly, so
+        # request the configured size instead of storing full-width ones
+        self._embedding_options: Dict[str, Any] = {"encoding_format": "float"}
+        if self.embedding_model.startswith("text-embedding-3"):
+            self._embedding_options["dimensions"] = int(settings.EMBEDDING_DIMENSION)
+        # Repeated texts (re-uploads, common queries) skip the API call
+        self._cache = LRUEmbeddingCache(1024, 3600)
+        # Paraphrased repeat questions over the same context reuse the answer
+        self._completion_cache = SemanticCompletionCache(self.get_embedding)
+        # Worker threads for concurrent embedding batches; the client retries
+        # rate-limited requests itself, honoring Retry-After with jitter
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.MAX_CONCURRENT_BATCHES,
+            thread_name_prefix="openai-embed",
+        )
 
-    def get_embedding(self, text: str) -> List[float]:
+    async def aclose(self) -> None:
+        """Close the HTTP client and stop the embedding worker threads."""
+        self.client.close()
+        self._executor.shutdown(wait=False)
+
+    def get_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a given text using OpenAI.
 
@@ -26,14 +61,20 @@ class OpenAIProvider(ModelProvider):
             text: The text to generate an embedding for
 
         Returns:
-            A list of floats representing the embedding vector
+            A float32 array holding the embedding vector
         """
+        key = embedding_cache_key(self.embedding_model, text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
         response = self.client.embeddings.create(
-            model=self.embedding_model, input=text, encoding_format="float"
+            model=self.embedding_model, input=text, **self._embedding_options
         )
-        return response.data[0].embedding
+        embedding = np.asarray(response.data[0].embedding, dtype=np.float32)
+        return self._cache_embedding(key, embedding)
 
-    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for multiple texts using OpenAI.
 
@@ -41,12 +82,77 @@ class OpenAIProvider(ModelProvider):
             texts: List of texts to generate embeddings for
 
         Returns:
-            List of embedding vectors
+            A float32 array with one embedding vector per row
+        """
+        deduplicated = self._deduplicate(texts)
+        if deduplicated is not None:
+            unique, positions = deduplicated
+            return self.get_embeddings(unique)[positions]
+
+        # Only texts that weren't cached are sent to the API, in batches
+        # dispatched concurrently when there is more than one
+        embeddings, keys, batches = self._lookup_embeddings(texts)
+        if not batches:
+            return embeddings
+
+        batch_texts = [[texts[i] for i in batch] for batch in batches]
+        if len(batches) == 1:
+            results = [self._embed_batch(batch_texts[0])]
+        else:
+            results = self._executor.map(self._embed_batch, batch_texts)
+
+        self._store_embeddings(embeddings, keys, batches, results)
+        return embeddings
+
+    def _pack_batches(self, texts: List[str], indices: List[int]) -> List[List[int]]:
+        """
+        Greedily group indices into batches within the request limits.
+
+        Args:
+            texts: The texts to embed, in the same order as indices
+            indices: Positions of the texts in the caller's input
+
+        Returns:
+            Lists of indices, each holding at most EMBEDDING_BATCH_SIZE texts
+            and EMBEDDING_BATCH_TOKENS tokens
         """
+        if len(texts) <= 1:
+            return [indices] if indices else []
+
+        # Packing by an upper bound is exact whenever the token budget never
+        # binds, which saves running BPE over every text; only when it might
+        # are the texts actually tokenized
+        batches = self._pack_by_tokens(indices, map(Tokenizer.max_tokens, texts))
+        if len(batches) > -(-len(indices) // self.EMBEDDING_BATCH_SIZE):
+            token_counts = Tokenizer(self.embedding_model).count_tokens(texts)
+            batches = self._pack_by_tokens(indices, token_counts)
+        return batches
+
+    def _pack_by_tokens(
+        self, indices: List[int], token_counts: Iterable[int]
+    ) -> List[List[int]]:
+        """Greedily pack indices, given each text's token count, in order."""
+        batches: List[List[int]] = [[]]
+        batch_tokens = 0
+        for i, tokens in zip(indices, token_counts):
+            if batches[-1] and (
+                len(batches[-1]) == self.EMBEDDING_BATCH_SIZE
+                or batch_tokens + tokens > self.EMBEDDING_BATCH_TOKENS
+            ):
+                batches.append([])
+                batch_tokens = 0
+            batches[-1].append(i)
+            batch_tokens += tokens
+        return batches
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Request embeddings for one batch of texts, in input order."""
         response = self.client.embeddings.create(
-            model=self.embedding_model, input=texts, encoding_format="float"
+            model=self.embedding_model,
+            input=texts,
+            **self._embedding_options,
         )
-        return [data.embedding for data in response.data]
+        return [item.embedding for item in response.data]
 
     def generate_completion(
         self,
@@ -54,6 +160,9 @@ class OpenAIProvider(ModelProvider):
         context: str = None,
         temperature: float = 0.7,
         max_tokens: int = 500,
+        *,
+        query_embedding: Optional[np.ndarray] = None,
+        no_cache: bool = False,
     ) -> Dict[str, Any]:
         """
         Generate a completion response based on the prompt and optional context using OpenAI.
@@ -63,27 +172,29 @@ class OpenAIProvider(ModelProvider):
             context: Optional context to inform the completion
             temperature: Controls randomness of output (0.0-1.0)
             max_tokens: Maximum number of tokens to generate
+            query_embedding: Embedding of the prompt from retrieval, reused for
+                the semantic cache lookup instead of embedding the prompt again
+            no_cache: Skip the semantic cache, e.g. for sensitive prompts
 
         Returns:
             Dictionary with completion text and metadata
         """
-        system_prompt = "You are a helpful, accurate assistant."
-        user_prompt = prompt
-
-        if context:
-            user_prompt = f"Context:\n{context}\n\nQuestion: {prompt}"
+        namespace = SemanticCompletionCache.namespace(
+            self.completion_model, context, temperature, max_tokens
+        )
+        if not no_cache:
+            cached = self._completion_cache.get(prompt, namespace, query_embedding)
+            if cached is not None:
+                return cached
 
         response = self.client.chat.completions.create(
             model=self.completion_model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
+            messages=self._completion_messages(prompt, context),
             temperature=temperature,
             max_tokens=max_tokens,
         )
 
-        return {
+        completion = {
             "text": response.choices[0].message.content,
             "model": response.model,
             "token_usage": {
@@ -92,3 +203,67 @@ class OpenAIProvider(ModelProvider):
                 "total_tokens": response.usage.total_tokens,
             },
         }
+        if not no_cache:
+            self._completion_cache.set(prompt, namespace, completion, query_embedding)
+        return completion
+
+    def generate_completion_stream(
+        self,
+        prompt: str,
+        context: str = None,
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        *,
+        query_embedding: Optional[np.ndarray] = None,
+        no_cache: bool = False,
+    ) -> Iterator[str]:
+        """
+        Stream a completion as text fragments while the model generates it.
+
+        Takes the same arguments as generate_completion. A semantic cache hit
+        is yielded as a single fragment; a streamed answer is cached once it
+        has finished.
+        """
+        namespace = SemanticCompletionCache.namespace(
+            self.completion_model, context, temperature, max_tokens
+        )
+        if not no_cache:
+            cached = self._completion_cache.get(prompt, namespace, query_embedding)
+            if cached is not None:
+                yield cached["text"]
+                return
+
+        stream = self.client.chat.completions.create(
+            model=self.completion_model,
+            messages=self._completion_messages(prompt, context),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        parts = []
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield parts[-1]
+
+        if not no_cache:
+            completion = {
+                "text": "".join(parts),
+                "model": self.completion_model,
+                "token_usage": {},
+            }
+            self._completion_cache.set(prompt, namespace, completion, query_embedding)
+
+    @staticmethod
+    def _completion_messages(prompt: str, context: str) -> List[Dict[str, str]]:
+        """Build the chat messages for a prompt and optional context."""
+        system_prompt = "You are a helpful, accurate assistant."
+        user_prompt = prompt
+
+        if context:
+            user_prompt = f"Context:\n{context}\n\nQuestion: {prompt}"
+
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
@@ -1,13 +1,19 @@
 """Model provider factory."""
 
+from functools import lru_cache
+
 from app.core.config import settings
 from app.ml.base import ModelProvider
 
 
+@lru_cache(maxsize=1)
 def get_model_provider() -> ModelProvider:
     """
     Factory function to get the appropriate model provider based on settings.
 
+    The provider is built once per process so its HTTP clients and
+    connection pools are reused across requests.
+
     Returns:
         An instance of a ModelProvider implementation
     """
@@ -33,3 +39,10 @@ def get_model_provider() -> ModelProvider:
             f"Warning: Unrecognized model provider '{provider_type}'. Defaulting to OpenAI."
         )
         return OpenAIProvider()
+
+
+async def close_model_provider() -> None:
+    """Close the shared provider, if one was built, and forget it."""
+    if get_model_provider.cache_info().currsize:
+        await get_model_provider().aclose()
+        get_model_provider.cache_clear()
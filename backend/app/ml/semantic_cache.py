@@ -0,0 +1,155 @@
+"""Semantic cache for completion responses."""
+
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class SemanticCompletionCache:
+    """
+    Cache completions by question similarity rather than exact text.
+
+    Each entry stores the unit-normalized embedding of the question, the
+    completion, and a namespace derived from everything else the answer
+    depends on (model, generation parameters and the exact context). A
+    lookup returns a stored completion from the same namespace whose
+    question embedding has cosine similarity above the threshold, so
+    paraphrased repeats of a question over the same context skip the LLM.
+
+    Embeddings live in one preallocated float32 matrix, so a lookup is a
+    single matrix-vector product. The matrix grows in blocks of grow_by rows
+    up to capacity, after which the oldest entry is overwritten.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[str], np.ndarray],
+        capacity: int = 1024,
+        threshold: float = 0.92,
+        ttl: float = 3600.0,
+        grow_by: int = 256,
+    ):
+        self._embed = embed
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        self.grow_by = grow_by
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._namespaces = np.zeros(0, dtype=np.int64)
+        self._stored_at = np.zeros(0, dtype=np.float64)
+        self._completions: list = []
+        self._size = 0
+        self._next = 0
+
+    @staticmethod
+    def namespace(
+        model: str, context: Optional[str], temperature: float, max_tokens: int
+    ) -> int:
+        """Hash the non-question inputs of a completion into a namespace id."""
+        digest = hashlib.sha256(
+            f"{model}\0{temperature}\0{max_tokens}\0{context or ''}".encode()
+        ).digest()
+        return int.from_bytes(digest[:8], "little", signed=True)
+
+    def _question_vector(
+        self, prompt: str, embedding: Optional[np.ndarray] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Embed and normalize a question, or None if that isn't possible.
+
+        A precomputed embedding of the prompt is used as-is instead of
+        calling the embedding model again.
+        """
+        if embedding is not None:
+            vector = np.asarray(embedding, dtype=np.float32)
+        else:
+            try:
+                vector = np.asarray(self._embed(prompt), dtype=np.float32)
+            except Exception as e:
+                # The cache must never break a completion
+                logger.warning("Semantic cache could not embed prompt: %s", e)
+                return None
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            # Zero vectors are provider fallbacks and match nothing
+            return None
+        return vector / norm
+
+    def get(
+        self, prompt: str, namespace: int, embedding: Optional[np.ndarray] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Return a cached completion for a similar prompt, or None."""
+        vector = self._question_vector(prompt, embedding)
+        if vector is None:
+            return None
+
+        with self._lock:
+            if not self._size or self._matrix.shape[1] != vector.shape[0]:
+                return None
+            n = self._size
+            sims = self._matrix[:n] @ vector
+            live = (self._namespaces[:n] == namespace) & (
+                time.monotonic() - self._stored_at[:n] <= self.ttl
+            )
+            sims = np.where(live, sims, -1.0)
+            best = int(np.argmax(sims))
+            if sims[best] < self.threshold:
+                return None
+            logger.debug("Semantic cache hit (similarity %.3f)", sims[best])
+            return dict(self._completions[best])
+
+    def set(
+        self,
+        prompt: str,
+        namespace: int,
+        completion: Dict[str, Any],
+        embedding: Optional[np.ndarray] = None,
+    ) -> None:
+        """Store a completion for a prompt within a namespace."""
+        vector = self._question_vector(prompt, embedding)
+        if vector is None:
+            return
+        completion = dict(completion)
+
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+                # First entry (or the embedding model changed): start over
+                self._matrix = np.zeros((0, vector.shape[0]), dtype=np.float32)
+                self._namespaces = np.zeros(0, dtype=np.int64)
+                self._stored_at = np.zeros(0, dtype=np.float64)
+                self._completions = []
+                self._size = 0
+                self._next = 0
+
+            if self._size < self.capacity:
+                slot = self._size
+                if slot == self._matrix.shape[0]:
+                    rows = min(self.grow_by, self.capacity - slot)
+                    self._matrix = np.vstack(
+                        [self._matrix, np.zeros((rows, vector.shape[0]), np.float32)]
+                    )
+                    self._namespaces = np.concatenate(
+                        [self._namespaces, np.zeros(rows, dtype=np.int64)]
+                    )
+                    self._stored_at = np.concatenate(
+                        [self._stored_at, np.zeros(rows, dtype=np.float64)]
+                    )
+                self._size += 1
+                self._completions.append(completion)
+            else:
+                # Full: overwrite the oldest entry
+                slot = self._next
+                self._next = (self._next + 1) % self.capacity
+                self._completions[slot] = completion
+
+            self._matrix[slot] = vector
+            self._namespaces[slot] = namespace
+            self._stored_at[slot] = time.monotonic()
@@ -1,9 +1,21 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Integer, String, Text
-from sqlalchemy.dialects.postgresql import ARRAY, FLOAT, UUID
+from pgvector.sqlalchemy import HALFVEC
+from sqlalchemy import (
+    Column,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR, UUID
+from sqlalchemy.orm import deferred
 
+from app.core.config import settings
 from app.db.base_class import Base
 
 
@@ -18,10 +30,36 @@ class Document(Base):
 
 
 class DocumentChunk(Base):
+    __table_args__ = (
+        # Serves document_id lookups and returns chunks already in chunk order
+        Index("ix_chunk_doc_idx", "document_id", "chunk_index"),
+        # Approximate nearest-neighbour index for cosine-distance search
+        Index(
+            "ix_document_chunk_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "halfvec_cosine_ops"},
+        ),
+        # Full-text index for the text-search fallback
+        Index("ix_document_chunk_content_tsv", "content_tsv", postgresql_using="gin"),
+    )
+
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    document_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    # Chunks are removed by the database when their document is deleted
+    document_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("document.id", ondelete="CASCADE"),
+        nullable=False,
+    )
     chunk_index = Column(Integer, nullable=False)
     content = Column(Text, nullable=False)
-    embedding = Column(ARRAY(FLOAT), nullable=True)
+    # Maintained by Postgres from content; deferred so ORM loads skip it
+    content_tsv = deferred(
+        Column(TSVECTOR, Computed("to_tsvector('english', content)", persisted=True))
+    )
+    # L2-normalized at ingest; NULL when the chunk could not be embedded.
+    # Half precision halves the bytes each HNSW traversal has to read.
+    embedding = Column(HALFVEC(settings.EMBEDDING_DIMENSION), nullable=True)
     token_count = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 
 class DocumentBase(BaseModel):
@@ -20,8 +20,7 @@ class DocumentResponse(BaseModel):
     status: str
     created_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra="ignore")
 
 
 class DocumentChunkBase(BaseModel):
@@ -39,8 +38,7 @@ class DocumentChunkResponse(DocumentChunkBase):
     id: UUID
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra="ignore")
 
 
 class DocumentSearchQuery(BaseModel):
@@ -56,11 +54,15 @@ class SearchResultItem(BaseModel):
     chunk_index: int
     similarity: float
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra="ignore")
 
 
 class SearchResponse(BaseModel):
     results: List[SearchResultItem]
     total: int
     query: str
+
+
+# Validate/serialize whole lists in one pydantic-core call instead of per item
+DocumentResponseList = TypeAdapter(List[DocumentResponse])
+SearchResultList = TypeAdapter(List[SearchResultItem])
@@ -1,13 +1,18 @@
-from typing import Any, Dict, List, Optional
-from uuid import UUID
+import csv
+import io
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID, uuid4
 
-from sqlalchemy import func
-from sqlalchemy.dialects.postgresql import ARRAY, FLOAT
-from sqlalchemy.orm import Session
-from sqlalchemy.sql.expression import cast
+import numpy as np
+from pgvector.utils import HalfVector
+from sqlalchemy import delete, func, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, defer
 
 from app.core.config import settings
 from app.core.logging_config import get_logger
+from app.ml.base import EmbeddingError, ModelProvider
 from app.ml.provider import get_model_provider
 from app.models.document import Document, DocumentChunk
 from app.utils.text_splitter import TextSplitter
@@ -15,6 +20,26 @@ from app.utils.tokenizer import Tokenizer
 
 logger = get_logger(__name__)
 
+_CHUNK_COPY_COLUMNS = (
+    "id",
+    "document_id",
+    "chunk_index",
+    "content",
+    "embedding",
+    "token_count",
+    "created_at",
+)
+
+# A document's listing fields plus an is_processed flag computed in the
+# database, so neither the content nor the chunk_ids array is loaded
+_DOCUMENT_SUMMARY = select(
+    Document.id,
+    Document.filename,
+    Document.created_at,
+    Document.updated_at,
+    (func.coalesce(func.cardinality(Document.chunk_ids), 0) > 0).label("is_processed"),
+)
+
 
 class DocumentService:
     """
@@ -42,9 +67,11 @@ class DocumentService:
         return document
 
     @staticmethod
-    def process_document(db: Session, document: Document) -> List[DocumentChunk]:
+    def process_document(db: Session, document: Document) -> List[UUID]:
         """
         Process a document into chunks and create embeddings.
+
+        Returns the IDs of the created chunks, in chunk order.
         """
         logger.info(
             f"Processing document: {document.id}, filename: {document.filename}"
@@ -70,48 +97,96 @@ class DocumentService:
             f"Token counts calculated: {sum(token_counts) if isinstance(token_counts, list) else 0} total tokens"
         )
 
-        # Create document chunks with embeddings
-        document_chunks = []
-        chunk_ids = []
-
         # For better performance, get all embeddings at once
         logger.debug("Generating embeddings for all chunks")
-        embeddings = model_provider.get_embeddings(chunks)
+        try:
+            embeddings = list(model_provider.get_embeddings(chunks))
+        except EmbeddingError as e:
+            # Retry chunk by chunk; the provider cache keeps any rows that
+            # did succeed, and chunks that still fail are stored without an
+            # embedding so they stay out of vector search
+            logger.warning(f"Batch embedding failed, retrying per chunk: {e}")
+            embeddings = [
+                DocumentService._embed_or_none(model_provider, chunk)
+                for chunk in chunks
+            ]
         logger.debug(f"Generated {len(embeddings)} embeddings")
 
+        # Store unit-length rows so cosine similarity is a plain dot product
+        embeddings = [
+            None
+            if embedding is None
+            else embedding / (np.linalg.norm(embedding) + 1e-12)
+            for embedding in embeddings
+        ]
+
+        # IDs are assigned here rather than by a per-chunk flush, and all rows
+        # are streamed to the server in a single COPY
         logger.debug("Creating document chunk records")
-        for i, (chunk_text, embedding, token_count) in enumerate(
-            zip(chunks, embeddings, token_counts)
-        ):
-            # Create chunk
-            chunk = DocumentChunk(
-                document_id=document.id,
-                chunk_index=i,
-                content=chunk_text,
-                embedding=embedding,
-                token_count=token_count,
+        created_at = datetime.utcnow()
+        rows = [
+            (
+                uuid4(),
+                document.id,
+                i,
+                chunk_text,
+                None if embedding is None else HalfVector(embedding).to_text(),
+                token_count,
+                created_at,
             )
+            for i, (chunk_text, embedding, token_count) in enumerate(
+                zip(chunks, embeddings, token_counts)
+            )
+        ]
+        if rows:
+            DocumentService._copy_chunks(db, rows)
+        chunk_ids = [row[0] for row in rows]
 
-            db.add(chunk)
-            db.flush()  # Flush to get the ID
-
-            document_chunks.append(chunk)
-            chunk_ids.append(chunk.id)
-
-        # Update document with chunk IDs
+        # Update document with chunk IDs. The commit expires the instance, so
+        # the ID is read beforehand and nothing is refreshed: callers only
+        # need the returned chunk IDs, and reloading would fetch the content
+        document_id = document.id
         logger.debug(f"Updating document with {len(chunk_ids)} chunk IDs")
         document.chunk_ids = chunk_ids
         db.commit()
 
-        # Refresh all objects
-        for chunk in document_chunks:
-            db.refresh(chunk)
-        db.refresh(document)
-
         logger.info(
-            f"Document {document.id} processing completed with {len(document_chunks)} chunks"
+            f"Document {document_id} processing completed with {len(chunk_ids)} chunks"
         )
-        return document_chunks
+        return chunk_ids
+
+    @staticmethod
+    def _copy_chunks(db: Session, rows: List[tuple]) -> None:
+        """
+        Write chunk rows with COPY inside the session's transaction.
+
+        Rows are tuples in _CHUNK_COPY_COLUMNS order; None becomes NULL.
+        Column defaults don't apply to COPY, so every column is supplied.
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {DocumentChunk.__tablename__}"
+                f" ({', '.join(_CHUNK_COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _embed_or_none(
+        model_provider: ModelProvider, text: str
+    ) -> Optional[np.ndarray]:
+        """Embed a single chunk, or return None if the provider fails."""
+        try:
+            return model_provider.get_embedding(text)
+        except EmbeddingError as e:
+            logger.error(f"Skipping embedding for chunk: {e}")
+            return None
 
     @staticmethod
     def get_document_by_id(db: Session, document_id: str) -> Optional[Document]:
@@ -127,22 +202,34 @@ class DocumentService:
         return document
 
     @staticmethod
-    def get_all_documents(
-        db: Session, skip: int = 0, limit: int = 100
-    ) -> List[Document]:
+    def get_document_summary(db: Session, document_id: str) -> Optional[Row]:
+        """
+        Get a document's listing fields by its ID.
+
+        Returns a row shaped like those of get_all_documents, so status polls
+        and existence checks never load the document's content.
+        """
+        logger.debug(f"Retrieving summary of document with ID: {document_id}")
+        return db.execute(_DOCUMENT_SUMMARY.where(Document.id == document_id)).first()
+
+    @staticmethod
+    def get_all_documents(db: Session, skip: int = 0, limit: int = 100) -> List[Row]:
         """
         Get all documents with pagination.
+
+        Returns rows with only the columns the listing needs (id, filename,
+        created_at, updated_at) plus an is_processed flag computed in the
+        database, so neither the content nor the chunk_ids array is loaded.
         """
         logger.debug(
             f"Retrieving all documents with pagination (skip={skip}, limit={limit})"
         )
-        documents = (
-            db.query(Document)
-            .order_by(Document.created_at.desc())
+        stmt = (
+            _DOCUMENT_SUMMARY.order_by(Document.created_at.desc())
             .offset(skip)
             .limit(limit)
-            .all()
         )
+        documents = db.execute(stmt).all()
         logger.debug(f"Retrieved {len(documents)} documents")
         return documents
 
@@ -153,24 +240,17 @@ class DocumentService:
         """
         logger.info(f"Deleting document with ID: {document_id}")
 
-        # Delete related chunks first
-        logger.debug(f"Deleting chunks for document {document_id}")
-        chunks_deleted = (
-            db.query(DocumentChunk)
-            .filter(DocumentChunk.document_id == document_id)
-            .delete()
-        )
-        logger.debug(f"Deleted {chunks_deleted} chunks")
-
-        # Delete the document
-        logger.debug(f"Deleting document {document_id}")
-        result = db.query(Document).filter(Document.id == document_id).delete()
+        # Chunks go with it via ON DELETE CASCADE; RETURNING tells us whether
+        # the document existed
+        deleted = db.execute(
+            delete(Document).where(Document.id == document_id).returning(Document.id)
+        ).first()
         db.commit()
 
         logger.info(
-            f"Document {document_id} {'deleted successfully' if result > 0 else 'not found'}"
+            f"Document {document_id} {'deleted successfully' if deleted else 'not found'}"
         )
-        return result > 0
+        return deleted is not None
 
     @staticmethod
     def get_document_chunks(db: Session, document_id: str) -> List[DocumentChunk]:
@@ -186,3 +266,23 @@ class DocumentService:
         )
         logger.debug(f"Retrieved {len(chunks)} chunks for document {document_id}")
         return chunks
+
+    @staticmethod
+    def iter_document_chunks(
+        db: Session, document_id: str, batch_size: int = 256
+    ) -> Iterator[DocumentChunk]:
+        """
+        Stream the chunks for a document in chunk order.
+
+        Rows are fetched from a server-side cursor in batches of batch_size
+        instead of all at once, and embeddings are not loaded.
+        """
+        logger.debug(f"Streaming chunks for document {document_id}")
+        stmt = (
+            select(DocumentChunk)
+            .options(defer(DocumentChunk.embedding))
+            .filter(DocumentChunk.document_id == document_id)
+            .order_by(DocumentChunk.chunk_index)
+            .execution_options(yield_per=batch_size)
+        )
+        yield from db.scalars(stmt)
@@ -1,22 +1,192 @@
 """Search service for document querying and retrieval."""
 
-from typing import Any, Dict, List
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import func, text
-from sqlalchemy.dialects.postgresql import ARRAY, FLOAT
+import numpy as np
+from pgvector.sqlalchemy import HALFVEC
+from sqlalchemy import bindparam, text
 from sqlalchemy.orm import Session
-from sqlalchemy.sql.expression import cast
 
+from app.core.config import settings
 from app.core.logging_config import get_logger
+from app.db.init_db import BINARY_QUANTIZED_EMBEDDING, estimate_rows, hnsw_params
+from app.ml.base import EmbeddingError
+from app.ml.cache import RedisEmbeddingCache
 from app.ml.provider import get_model_provider
-from app.models.document import Document, DocumentChunk
+from app.models.document import DocumentChunk
 
 logger = get_logger(__name__)
 
+# Top-k chunks by cosine distance, joined to their filename, in one round trip.
+# The query embedding is bound as a float32 array, which the HALFVEC type sends
+# as a single '[x,y,...]' literal rather than one SQL float per dimension.
+# Ranking happens in a subquery over (id, distance) only, ordered by the
+# selected distance so <=> runs once per row and the HNSW index serves it;
+# content and filename are fetched for the k survivors alone. Rows come back
+# in the shape of a search result, similarity included.
+_Q_VECTOR_SEARCH = text(
+    "SELECT c.document_id, c.id AS chunk_id, d.filename AS document_filename,"
+    " c.content, c.chunk_index, 1 - top.distance AS similarity"
+    " FROM (SELECT id, embedding <=> CAST(:q AS halfvec) AS distance"
+    " FROM documentchunk"
+    " WHERE embedding IS NOT NULL"
+    " ORDER BY distance"
+    " LIMIT :k) top"
+    " JOIN documentchunk c ON c.id = top.id"
+    " JOIN document d ON d.id = c.document_id"
+    " ORDER BY top.distance"
+).bindparams(bindparam("q", type_=HALFVEC()))
+
+# Two-stage variant: Hamming distance over binary-quantized embeddings picks
+# :candidates rows from the (much smaller) bit index, which are then re-ranked
+# by exact cosine distance against the halfvec embedding
+_Q_BINARY_VECTOR_SEARCH = text(
+    "SELECT c.document_id, c.id AS chunk_id, d.filename AS document_filename,"
+    " c.content, c.chunk_index,"
+    " 1 - (c.embedding <=> CAST(:q AS halfvec)) AS similarity"
+    " FROM (SELECT id FROM documentchunk"
+    " WHERE embedding IS NOT NULL"
+    f" ORDER BY {BINARY_QUANTIZED_EMBEDDING}"
+    " <~> binary_quantize(CAST(:q AS halfvec))"
+    " LIMIT :candidates) candidates"
+    " JOIN documentchunk c ON c.id = candidates.id"
+    " JOIN document d ON d.id = c.document_id"
+    " ORDER BY similarity DESC"
+    " LIMIT :k"
+).bindparams(bindparam("q", type_=HALFVEC()))
+
+# Full-text fallback ranked in the database, served by the GIN index on
+# content_tsv. Normalization 32 scales ts_rank_cd into [0, 1) like a similarity.
+_Q_TEXT_SEARCH = text(
+    "SELECT c.document_id, c.id AS chunk_id, d.filename AS document_filename,"
+    " c.content, c.chunk_index,"
+    " ts_rank_cd(c.content_tsv, query, 32) AS similarity"
+    " FROM documentchunk c JOIN document d ON d.id = c.document_id,"
+    " plainto_tsquery('english', :q) query"
+    " WHERE c.content_tsv @@ query"
+    " ORDER BY similarity DESC"
+    " LIMIT :k"
+)
+
+# Candidate list size for HNSW scans in the current transaction
+_Q_HNSW_EF_SEARCH = text("SELECT set_config('hnsw.ef_search', :ef_search, true)")
+
+# Sized from the chunk count; the collection grows with uploads, so the
+# tier is re-read from the row estimate once this many seconds have passed.
+# init_db has already made sure pgvector is installed
+_HNSW_STATE_TTL = 300.0
+_hnsw_state: Dict[str, Tuple[float, int]] = {}
+
+
+def _hnsw_ef_search(db: Session) -> int:
+    """
+    Return the hnsw.ef_search tier for the collection.
+
+    Results are cached for _HNSW_STATE_TTL seconds.
+    """
+    cached = _hnsw_state.get("ef_search")
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    chunk_count = estimate_rows(db, DocumentChunk.__tablename__)
+    ef_search = hnsw_params(chunk_count).ef_search
+    if not cached or cached[1] != ef_search:
+        logger.info("Using hnsw.ef_search=%s for ~%s chunks", ef_search, chunk_count)
+    _hnsw_state["ef_search"] = (time.monotonic() + _HNSW_STATE_TTL, ef_search)
+    return ef_search
+
+
+class _QueryKey:
+    """
+    Cache key for a search query.
+
+    Compares by the lowercased, whitespace-collapsed query but carries the
+    original text, which is what gets embedded ("IT" and "it" differ to the
+    model).
+    """
+
+    __slots__ = ("text", "normalized")
+
+    def __init__(self, query: str):
+        self.text = query.strip()
+        self.normalized = " ".join(query.lower().split())
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _QueryKey) and self.normalized == other.normalized
+
+    def __hash__(self) -> int:
+        return hash(self.normalized)
+
+
+@lru_cache(maxsize=1)
+def _shared_query_cache() -> Optional[RedisEmbeddingCache]:
+    """Return the Redis query embedding cache, or None if REDIS_URL is unset."""
+    if not settings.REDIS_URL:
+        return None
+    try:
+        return RedisEmbeddingCache(settings.REDIS_URL, prefix="qemb")
+    except ImportError:
+        logger.warning("REDIS_URL is set but the redis package is not installed")
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _get_query_embedding(query: _QueryKey) -> np.ndarray:
+    """
+    Embed a search query, caching the result under its normalized form.
+
+    Repeated questions (retries, popular queries) skip the embedding call
+    entirely: first via this per-process cache, then via Redis when
+    REDIS_URL is set, so a query embedded by one worker is reused by all.
+    The vector is scaled to unit length like the stored chunk embeddings,
+    and the cached array is read-only so callers can't mutate a shared entry.
+
+    Raises:
+        EmbeddingError: If the provider fails or returns an all-zero vector;
+            nothing is cached, so the next call tries the provider again
+    """
+    model_provider = get_model_provider()
+    model = getattr(model_provider, "embedding_model", settings.EMBEDDING_MODEL)
+    shared_cache = _shared_query_cache()
+    if shared_cache is not None:
+        # get() treats all-zero entries as misses
+        embedding = shared_cache.get(model, query.normalized)
+        if embedding is not None:
+            return embedding
+
+    embedding = model_provider.get_embedding(query.text)
+    # Some providers report a failed call as a zero vector, which has no
+    # direction to rank by (pgvector scores it NaN); raising keeps it out of
+    # the lru_cache, which doesn't cache exceptions
+    if not embedding.any():
+        raise EmbeddingError("Provider returned an all-zero query embedding")
+    embedding = embedding / (np.linalg.norm(embedding) + 1e-12)
+    embedding = embedding.astype(np.float32, copy=False)
+    embedding.flags.writeable = False
+    if shared_cache is not None:
+        shared_cache.set(model, query.normalized, embedding)
+    return embedding
+
 
 class SearchService:
     """Service for search operations."""
 
+    @staticmethod
+    def get_query_embedding(query: str) -> Optional[np.ndarray]:
+        """
+        Return the (cached) normalized embedding search_documents uses for query.
+
+        Lets callers reuse the retrieval embedding, e.g. for the completion
+        cache, without another embedding call. Returns None if the query
+        can't be embedded.
+        """
+        try:
+            return _get_query_embedding(_QueryKey(query))
+        except EmbeddingError:
+            return None
+
     @staticmethod
     def search_documents(
         db: Session, query: str, limit: int = 5
@@ -37,73 +207,40 @@ class SearchService:
                 f"Searching for documents matching query: '{query}' with limit: {limit}"
             )
 
-            # Get model provider for embedding the query
-            model_provider = get_model_provider()
-
-            # Get query embedding
+            # Get query embedding (cached for repeated queries)
             logger.debug("Generating embedding for search query")
-            query_embedding = model_provider.get_embedding(query)
-            logger.debug(f"Embedding generated with dimension: {len(query_embedding)}")
-
-            # First, check if the pgvector extension is available
-            logger.debug("Checking if pgvector extension is available")
-            pgvector_check = db.execute(
-                text(
-                    "SELECT EXISTS(SELECT 1 FROM pg_extension WHERE extname = 'vector')"
-                )
-            ).scalar()
-            if not pgvector_check:
+            try:
+                query_embedding = _get_query_embedding(_QueryKey(query))
+            except EmbeddingError as e:
                 logger.warning(
-                    "pgvector extension not available, falling back to text search"
+                    f"Could not embed query, falling back to text search: {e}"
                 )
-                # Fallback to simpler search if pgvector is not available
                 return SearchService._fallback_search(db, query, limit)
+            logger.debug(f"Embedding generated with dimension: {len(query_embedding)}")
 
-            # Try to use the cosine_similarity function from pgvector
             try:
                 logger.debug("Performing vector similarity search")
-                # Query to find chunks with similar embeddings
-                chunks_with_similarity = (
-                    db.query(
-                        DocumentChunk,
-                        Document.filename.label("document_filename"),
-                        func.cosine_similarity(
-                            DocumentChunk.embedding, cast(query_embedding, ARRAY(FLOAT))
-                        ).label("similarity"),
-                    )
-                    .join(Document, DocumentChunk.document_id == Document.id)
-                    .order_by(
-                        func.cosine_similarity(
-                            DocumentChunk.embedding, cast(query_embedding, ARRAY(FLOAT))
-                        ).desc()
-                    )
-                    .limit(limit)
-                    .all()
-                )
-
-                # Format results
-                results = []
-                for chunk, filename, similarity in chunks_with_similarity:
-                    results.append(
-                        {
-                            "document_id": chunk.document_id,
-                            "chunk_id": chunk.id,
-                            "document_filename": filename,
-                            "content": chunk.content,
-                            "chunk_index": chunk.chunk_index,
-                            "similarity": float(similarity)
-                            if similarity is not None
-                            else 0.0,
-                        }
-                    )
+                # An HNSW scan returns at most ef_search rows, so the rows
+                # the index has to produce must fit in it
+                ef_search = max(_hnsw_ef_search(db), limit)
+                params = {"q": query_embedding, "k": limit}
+                statement = _Q_VECTOR_SEARCH
+                if settings.BINARY_QUANTIZED_SEARCH:
+                    candidates = max(settings.BINARY_SEARCH_CANDIDATES, limit)
+                    ef_search = max(ef_search, candidates)
+                    params["candidates"] = candidates
+                    statement = _Q_BINARY_VECTOR_SEARCH
+                db.execute(_Q_HNSW_EF_SEARCH, {"ef_search": str(ef_search)})
+                rows = db.execute(statement, params).mappings().all()
+                results = [dict(row) for row in rows]
 
                 logger.info(f"Vector search returned {len(results)} results")
                 return results
             except Exception as e:
-                logger.error(
-                    f"Error using cosine_similarity function: {str(e)}", exc_info=True
-                )
-                # If cosine_similarity function call fails, try fallback
+                logger.error(f"Error running vector search: {str(e)}", exc_info=True)
+                # The failed statement aborted the transaction; reset it so the
+                # fallback query can run
+                db.rollback()
                 return SearchService._fallback_search(db, query, limit)
 
         except Exception as e:
@@ -119,47 +256,13 @@ class SearchService:
     ) -> List[Dict[str, Any]]:
         """Fallback search method using text similarity when vector search is unavailable"""
         logger.info(f"Using fallback text search method for query: '{query}'")
-        # Simple text search fallback
-        query_lower = query.lower()
-
-        # Get all chunks and sort them by simple text matching
-        logger.debug("Fetching all document chunks for text search")
-        chunks = (
-            db.query(DocumentChunk, Document.filename.label("document_filename"))
-            .join(Document, DocumentChunk.document_id == Document.id)
-            .all()
-        )
-        logger.debug(f"Retrieved {len(chunks)} chunks for text search")
-
-        # Score chunks based on text similarity (simple contains check)
-        scored_chunks = []
-        matched_chunks = 0
-        for chunk, filename in chunks:
-            content_lower = chunk.content.lower()
-            # Basic relevance score based on whether the content contains query terms
-            if query_lower in content_lower:
-                matched_chunks += 1
-                # Calculate a simple similarity score based on term frequency
-                similarity = content_lower.count(query_lower) / len(content_lower)
-                scored_chunks.append((chunk, filename, similarity))
-
-        logger.debug(f"Found {matched_chunks} chunks containing the search query")
-
-        # Sort by similarity score and limit results
-        scored_chunks.sort(key=lambda x: x[2], reverse=True)
-        results = []
-
-        for chunk, filename, similarity in scored_chunks[:limit]:
-            results.append(
-                {
-                    "document_id": chunk.document_id,
-                    "chunk_id": chunk.id,
-                    "document_filename": filename,
-                    "content": chunk.content,
-                    "chunk_index": chunk.chunk_index,
-                    "similarity": float(similarity),
-                }
-            )
+        if not query.strip():
+            return []
+
+        # Matching, ranking and top-k selection all run in the database, so
+        # only the returned rows are transferred
+        rows = db.execute(_Q_TEXT_SEARCH, {"q": query, "k": limit}).mappings().all()
+        results = [dict(row) for row in rows]
 
         logger.info(f"Text search returned {len(results)} results")
         return results
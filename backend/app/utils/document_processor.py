@@ -1,18 +1,198 @@
 import io
 import os
-import tempfile
 import logging
-from typing import Tuple, List
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, Tuple, List
 from fastapi import HTTPException, status
 
 logger = logging.getLogger(__name__)
 
+# Text-bearing run children, as python-docx's Run.text reads them
+_RUN_CONTENT = ("w:br", "w:cr", "w:noBreakHyphen", "w:ptab", "w:t", "w:tab")
+
+
+@lru_cache(maxsize=1)
+def _paragraph_content_xpath():
+    """
+    Compile the query for every text-bearing element of a paragraph.
+
+    Covers direct runs and hyperlink runs, in document order. Compiled once,
+    unlike the per-run xpath() calls behind python-docx's Paragraph.text.
+    lxml is imported here because it only ships with the optional python-docx.
+    """
+    from lxml import etree
+
+    return etree.XPath(
+        " | ".join(
+            f"{parent}/{child}"
+            for parent in ("w:r", "w:hyperlink/w:r")
+            for child in _RUN_CONTENT
+        ),
+        namespaces={"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"},
+    )
+
+
+def _paragraph_text(paragraph) -> str:
+    """Return the same text as python-docx's paragraph.text in one XPath pass."""
+    # python-docx's element classes render their own text (tab -> "\t", ...)
+    return "".join(str(e) for e in _paragraph_content_xpath()(paragraph._p))
+
+
+@lru_cache(maxsize=1)
+def _get_fitz():
+    """Import PyMuPDF once; a failed import is retried on the next upload."""
+    import fitz  # PyMuPDF
+
+    return fitz
+
+
+@lru_cache(maxsize=1)
+def _get_docx():
+    """Import python-docx once; a failed import is retried on the next upload."""
+    import docx
+
+    return docx
+
+
+def _extract_pdf(content: bytes, filename: str) -> Tuple[str, str]:
+    """Extract the text of every page of a PDF."""
+    logger.debug(f"Processing PDF file: {filename}")
+    try:
+        fitz = _get_fitz()
+        # Plain text in content-stream order (no line sorting), with
+        # ligatures like "ﬁ" expanded so the text embeds and
+        # matches as the words a user would type
+        text_flags = fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_LIGATURES
+        # Large uploads arrive as a bytearray, which PyMuPDF would
+        # copy into bytes; a memoryview is wrapped without copying
+        # (accepted since PyMuPDF 1.26)
+        with fitz.open(stream=memoryview(content), filetype="pdf") as pdf_doc:
+            # Join once instead of growing a string page by page,
+            # which recopies all earlier text on every page
+            extracted_text = "".join(
+                page.get_text("text", sort=False, flags=text_flags) + "\n\n"
+                for page in pdf_doc
+            )
+        logger.debug(f"Extracted {len(extracted_text)} characters from PDF")
+        return extracted_text, "application/pdf"
+    except ImportError:
+        logger.error("PyMuPDF is not installed. Cannot process PDF files.")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="PDF processing is not available. Please install PyMuPDF library."
+        )
+    except Exception as e:
+        logger.error(f"Error extracting text from PDF: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Could not extract text from PDF: {str(e)}"
+        )
+
+
+def _extract_docx(content: bytes, filename: str) -> Tuple[str, str]:
+    """Extract paragraphs, tables, headers and footers from a DOCX document."""
+    logger.debug(f"Processing DOCX document: {filename}")
+    try:
+        docx = _get_docx()
+        # python-docx reads the upload straight from memory
+        doc = docx.Document(io.BytesIO(content))
+
+        # Paragraphs, then table rows, then headers/footers, joined once
+        extracted_text = "\n".join(DocumentProcessor._iter_docx_text(doc))
+        logger.debug(f"Extracted {len(extracted_text)} characters from DOCX")
+        return (
+            extracted_text,
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        )
+    except ImportError:
+        logger.error("python-docx is not installed. Cannot process DOCX files.")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="DOCX processing is not available. Please install python-docx library."
+        )
+    except Exception as e:
+        logger.error(f"Error extracting text from DOCX: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Could not extract text from DOCX: {str(e)}"
+        )
+
+
+def _extract_plain_text(content: bytes, filename: str) -> Tuple[str, str]:
+    """Decode a text file, detecting legacy encodings when it isn't UTF-8."""
+    # For text files and other formats, try to decode as UTF-8
+    try:
+        # ASCII is a strict subset of UTF-8; isascii() is a cheap
+        # vectorized scan that lets us skip the full UTF-8 validator.
+        if content.isascii():
+            extracted_text = content.decode("ascii")
+        else:
+            # utf-8-sig also drops a leading byte order mark
+            extracted_text = content.decode("utf-8-sig")
+        logger.debug(f"Successfully decoded file content as UTF-8")
+    except UnicodeDecodeError:
+        # Legacy encodings (Latin-1, Windows-1252, ...) are common in
+        # older text files; detect the most likely one
+        from charset_normalizer import from_bytes
+
+        best = from_bytes(content).best()
+        if best is None:
+            logger.warning(f"File {filename} is not UTF-8 encoded")
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="File encoding not supported. Please upload a UTF-8 encoded text file, PDF, or DOCX document.",
+            )
+        extracted_text = str(best)
+        logger.debug(f"Decoded file content as {best.encoding}")
+    return extracted_text, "text/plain"
+
+
+# Extractors by lowercased file extension; anything else is read as text
+_HANDLERS: Dict[str, Callable[[bytes, str], Tuple[str, str]]] = {
+    ".pdf": _extract_pdf,
+    ".docx": _extract_docx,
+}
+
+
 class DocumentProcessor:
     """
     Utility class to process different document types and extract text.
     Supports text files, PDF, and DOCX documents.
     """
     
+    @staticmethod
+    def _iter_docx_text(doc) -> Iterator[str]:
+        """
+        Yield the non-empty text blocks of a python-docx Document in order.
+
+        Each paragraph's text is read once, with a single compiled XPath query.
+        """
+        def joined(paragraphs) -> str:
+            return ' '.join(
+                text for text in (_paragraph_text(p) for p in paragraphs) if text.strip()
+            )
+
+        for para in doc.paragraphs:
+            text = _paragraph_text(para)
+            if text.strip():
+                yield text
+
+        for table in doc.tables:
+            for row in table.rows:
+                row_text = ' | '.join(
+                    text for text in (joined(cell.paragraphs) for cell in row.cells) if text
+                )
+                if row_text:
+                    yield row_text
+
+        for section in doc.sections:
+            header_text = joined(section.header.paragraphs)
+            if header_text:
+                yield f"Header: {header_text}"
+            footer_text = joined(section.footer.paragraphs)
+            if footer_text:
+                yield f"Footer: {footer_text}"
+
     @staticmethod
     def extract_text(content: bytes, filename: str) -> Tuple[str, str]:
         """
@@ -28,119 +208,15 @@ class DocumentProcessor:
         Raises:
             HTTPException: If file can't be processed
         """
-        # Get file extension
         _, file_ext = os.path.splitext(filename.lower())
-        content_type = "text/plain"  # Default content type
+        handler = _HANDLERS.get(file_ext, _extract_plain_text)
         
         try:
-            # Process PDF files
-            if file_ext == '.pdf':
-                logger.debug(f"Processing PDF file: {filename}")
-                try:
-                    import fitz  # PyMuPDF
-                    with fitz.open(stream=content, filetype="pdf") as pdf_doc:
-                        extracted_text = ""
-                        for page_num in range(len(pdf_doc)):
-                            page = pdf_doc[page_num]
-                            extracted_text += page.get_text() + "\n\n"
-                    logger.debug(f"Extracted {len(extracted_text)} characters from PDF")
-                    content_type = "application/pdf"
-                except ImportError:
-                    logger.error("PyMuPDF is not installed. Cannot process PDF files.")
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail="PDF processing is not available. Please install PyMuPDF library."
-                    )
-                except Exception as e:
-                    logger.error(f"Error extracting text from PDF: {str(e)}")
-                    raise HTTPException(
-                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                        detail=f"Could not extract text from PDF: {str(e)}"
-                    )
-                
-            # Process DOCX files    
-            elif file_ext == '.docx':
-                logger.debug(f"Processing DOCX document: {filename}")
-                try:
-                    # Save to temp file
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as temp_file:
-                        temp_file.write(content)
-                        temp_path = temp_file.name
-                    
-                    try:
-                        import docx
-                        # Process DOCX using python-docx
-                        doc = docx.Document(temp_path)
-                        
-                        # Extract all document content
-                        text_parts = []
-                        
-                        # Extract text from paragraphs
-                        for para in doc.paragraphs:
-                            if para.text.strip():
-                                text_parts.append(para.text)
-                        
-                        # Extract text from tables
-                        for table in doc.tables:
-                            for row in table.rows:
-                                row_text = []
-                                for cell in row.cells:
-                                    # Get text from cell paragraphs
-                                    cell_text = ' '.join([p.text for p in cell.paragraphs if p.text.strip()])
-                                    if cell_text:
-                                        row_text.append(cell_text)
-                                if row_text:
-                                    text_parts.append(' | '.join(row_text))
-                        
-                        # Extract text from headers
-                        for section in doc.sections:
-                            header = section.header
-                            if header:
-                                header_text = ' '.join([p.text for p in header.paragraphs if p.text.strip()])
-                                if header_text:
-                                    text_parts.append(f"Header: {header_text}")
-                            
-                            footer = section.footer
-                            if footer:
-                                footer_text = ' '.join([p.text for p in footer.paragraphs if p.text.strip()])
-                                if footer_text:
-                                    text_parts.append(f"Footer: {footer_text}")
-                        
-                        extracted_text = "\n".join(text_parts)
-                        logger.debug(f"Extracted {len(extracted_text)} characters from DOCX")
-                        content_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                    finally:
-                        # Clean up temp file
-                        os.unlink(temp_path)
-                        
-                except ImportError:
-                    logger.error("python-docx is not installed. Cannot process DOCX files.")
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail="DOCX processing is not available. Please install python-docx library."
-                    )
-                except Exception as e:
-                    logger.error(f"Error extracting text from DOCX: {str(e)}")
-                    raise HTTPException(
-                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                        detail=f"Could not extract text from DOCX: {str(e)}"
-                    )
-            
-            # Process text files
-            else:
-                # For text files and other formats, try to decode as UTF-8
-                try:
-                    extracted_text = content.decode("utf-8")
-                    logger.debug(f"Successfully decoded file content as UTF-8")
-                except UnicodeDecodeError:
-                    logger.warning(f"File {filename} is not UTF-8 encoded")
-                    raise HTTPException(
-                        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
-                        detail="File encoding not supported. Please upload a UTF-8 encoded text file, PDF, or DOCX document.",
-                    )
+            extracted_text, content_type = handler(content, filename)
             
             # Verify we have content
-            if not extracted_text or extracted_text.strip() == "":
+            # isspace() stops at the first non-blank character and copies nothing
+            if not extracted_text or extracted_text.isspace():
                 logger.warning(f"No text content extracted from file {filename}")
                 raise HTTPException(
                     status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -1,5 +1,7 @@
 from typing import List
 
+import numpy as np
+
 from app.ml.provider import get_model_provider
 
 
@@ -9,7 +11,7 @@ class EmbeddingUtil:
     """
 
     @staticmethod
-    def get_embedding(text: str) -> List[float]:
+    def get_embedding(text: str) -> np.ndarray:
         """
         Get embedding for a text using the configured model provider.
 
@@ -17,7 +19,7 @@ class EmbeddingUtil:
             text: Text to embed
 
         Returns:
-            Vector embedding as a list of floats
+            Vector embedding as a float32 array
         """
         # Get the appropriate model provider based on configuration
         provider = get_model_provider()
@@ -26,7 +28,7 @@ class EmbeddingUtil:
         return provider.get_embedding(text)
 
     @staticmethod
-    def get_embeddings(texts: List[str]) -> List[List[float]]:
+    def get_embeddings(texts: List[str]) -> np.ndarray:
         """
         Get embeddings for multiple texts using the configured model provider.
 
@@ -34,7 +36,7 @@ class EmbeddingUtil:
             texts: List of texts to embed
 
         Returns:
-            List of vector embeddings
+            Float32 array with one vector embedding per row
         """
         # Get the appropriate model provider based on configuration
         provider = get_model_provider()
@@ -1,6 +1,7 @@
 """Text splitting utilities for document processing."""
 
-from typing import List, Optional
+import re
+from typing import Iterator, List, Optional, Tuple
 
 from app.core.logging_config import get_logger
 
@@ -12,6 +13,10 @@ class TextSplitter:
     Utility for splitting text into smaller, semantically meaningful chunks.
     """
 
+    # A period followed by a space or newline; the lookahead only matches a
+    # character that is really there, never the end of the searched range
+    _PERIOD_END = re.compile(r"\.(?=[ \n])")
+
     def __init__(
         self,
         chunk_size: int = 1000,
@@ -44,44 +49,66 @@ class TextSplitter:
             List of text chunks
         """
         logger.debug(f"Splitting text of length {len(text)} characters")
+        chunks = list(self.iter_split(text))
+        logger.info(f"Split text into {len(chunks)} chunks")
+        return chunks
+
+    def iter_split(self, text: str) -> Iterator[str]:
+        """
+        Yield the chunks split_text would return, one at a time.
+
+        Lets consumers process chunks in batches without holding every chunk
+        copy alongside the original text.
+
+        Args:
+            text: The text to split
+
+        Yields:
+            Text chunks in order
+        """
+        for start_idx, end_idx in self.iter_offsets(text):
+            yield text[start_idx:end_idx]
+
+    def iter_offsets(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        Yield the (start, end) character offsets of each chunk.
+
+        Callers that only need chunk positions, or want to slice lazily, can
+        use these instead of copying every chunk out of the text.
+
+        Args:
+            text: The text to split
 
+        Yields:
+            (start, end) offsets such that text[start:end] is a chunk
+        """
         # Special case: text is shorter than chunk size
         if len(text) <= self.chunk_size:
-            logger.debug("Text is shorter than chunk size, returning as single chunk")
-            return [text]
+            yield 0, len(text)
+            return
 
-        chunks = []
         start_idx = 0
 
         while start_idx < len(text):
             # If we're near the end, just take the rest
             if start_idx + self.chunk_size >= len(text):
-                chunks.append(text[start_idx:])
-                logger.debug(f"Added final chunk from index {start_idx} to end")
-                break
+                yield start_idx, len(text)
+                return
 
             # Try to find a good stopping point
             end_idx = start_idx + self.chunk_size
 
-            # Only try to break at paragraph
+            # Only try to break at paragraph; otherwise use the hard cutoff
             paragraph_break = text.rfind("\n\n", start_idx, end_idx)
             if (
                 paragraph_break != -1
                 and paragraph_break > start_idx + self.chunk_size // 2
             ):
                 end_idx = paragraph_break + 2  # Include the double newline
-                logger.debug(f"Found paragraph break at index {paragraph_break}")
-            else:
-                # If no paragraph break, use hard cutoff
-                logger.debug(
-                    f"No paragraph break found, using hard cutoff at index {end_idx}"
-                )
-
-            # Add the chunk
-            chunks.append(text[start_idx:end_idx])
-            logger.debug(
-                f"Added chunk from index {start_idx} to {end_idx} (length: {end_idx - start_idx})"
-            )
+
+            # No per-chunk logging here: the loop runs once per chunk and
+            # split_text logs a summary
+            yield start_idx, end_idx
 
             # Move to next chunk with overlap
             start_idx = end_idx - self.chunk_overlap
@@ -89,21 +116,16 @@ class TextSplitter:
             # Make sure we're making progress
             if start_idx >= end_idx:
                 start_idx = end_idx
-                logger.debug("No progress made, moving to next position")
-
-        logger.info(f"Split text into {len(chunks)} chunks")
-        return chunks
 
     def _find_sentence_end(self, text: str, start: int, end: int) -> int:
         """Find the end of a sentence within the given range."""
-        # Look for periods followed by space or newline
-        for i in range(end - 1, start, -1):
-            if (
-                i < len(text) - 1
-                and text[i] == "."
-                and (text[i + 1] == " " or text[i + 1] == "\n")
-            ):
-                return i
+        # Prefer the last period followed by whitespace. The character after a
+        # period at end - 1 is text[end], so the search runs one past the range
+        last = None
+        for last in self._PERIOD_END.finditer(text, start + 1, end + 1):
+            pass
+        if last is not None:
+            return last.start()
 
         # Also check for other sentence-ending punctuation
         for punct in ["!", "?"]:
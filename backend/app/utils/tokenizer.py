@@ -1,6 +1,9 @@
 """Tokenization utilities for document processing."""
 
+import logging
+import os
 import re
+from functools import lru_cache
 from typing import List, Optional, Union
 
 import tiktoken
@@ -10,6 +13,26 @@ from app.core.logging_config import get_logger
 logger = get_logger(__name__)
 
 
+@lru_cache(maxsize=None)
+def _get_encoding(model_name: str) -> tiktoken.Encoding:
+    """
+    Load the tiktoken encoding for a model.
+
+    Cached because a Tokenizer is built per ingest and loading the BPE ranks
+    takes tens of milliseconds; Encoding objects are safe to share.
+    """
+    try:
+        encoding = tiktoken.encoding_for_model(model_name)
+        logger.debug(f"Using tiktoken encoding for model: {model_name}")
+        return encoding
+    except KeyError:
+        # Fall back to cl100k_base encoding (used for gpt-4, text-embedding-3-*)
+        logger.warning(
+            f"No specific encoding found for {model_name}, falling back to cl100k_base"
+        )
+        return tiktoken.get_encoding("cl100k_base")
+
+
 class Tokenizer:
     """
     Utility for tokenizing text and counting tokens.
@@ -23,15 +46,7 @@ class Tokenizer:
             model_name: The name of the model to use for tokenization
         """
         logger.debug(f"Initializing tokenizer for model: {model_name}")
-        try:
-            self.encoding = tiktoken.encoding_for_model(model_name)
-            logger.debug(f"Using tiktoken encoding for model: {model_name}")
-        except KeyError:
-            # Fall back to cl100k_base encoding (used for gpt-4, text-embedding-3-*)
-            logger.warning(
-                f"No specific encoding found for {model_name}, falling back to cl100k_base"
-            )
-            self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.encoding = _get_encoding(model_name)
 
     def count_tokens(self, text: Union[str, List[str]]) -> Union[int, List[int]]:
         """
@@ -45,22 +60,48 @@ class Tokenizer:
         """
         if isinstance(text, str):
             token_count = len(self.encoding.encode(text))
+            # Called once per chunk; %-style args skip formatting unless DEBUG is on
             logger.debug(
-                f"Counted {token_count} tokens in string (length: {len(text)})"
+                "Counted %d tokens in string (length: %d)", token_count, len(text)
             )
             return token_count
         elif isinstance(text, list):
-            token_counts = [len(self.encoding.encode(t)) for t in text]
-            total_tokens = sum(token_counts)
-            logger.debug(
-                f"Counted {total_tokens} total tokens across {len(text)} strings"
-            )
+            # encode_batch tokenizes on tiktoken's Rust thread pool, outside the GIL
+            token_counts = [
+                len(tokens)
+                for tokens in self.encoding.encode_batch(
+                    text, num_threads=os.cpu_count() or 1
+                )
+            ]
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Counted %d total tokens across %d strings",
+                    sum(token_counts),
+                    len(text),
+                )
             return token_counts
         else:
             error_msg = f"Input must be a string or list of strings, got {type(text)}"
             logger.error(error_msg)
             raise TypeError(error_msg)
 
+    @staticmethod
+    def max_tokens(text: str) -> int:
+        """
+        Cheap upper bound on the token count of text, without encoding it.
+
+        Byte-level BPE never emits more tokens than the text has UTF-8 bytes,
+        and an ASCII string has one byte per character. Useful for budget
+        checks that only need to know a limit can't be exceeded.
+
+        Args:
+            text: The text to bound
+
+        Returns:
+            An upper bound on the number of tokens
+        """
+        return len(text) if text.isascii() else len(text.encode("utf-8"))
+
     def tokenize(self, text: str) -> List[int]:
         """
         Tokenize a string into token IDs.
@@ -72,7 +113,7 @@ class Tokenizer:
             List of token IDs
         """
         tokens = self.encoding.encode(text)
-        logger.debug(f"Tokenized string into {len(tokens)} tokens")
+        logger.debug("Tokenized string into %d tokens", len(tokens))
         return tokens
 
     def decode(self, tokens: List[int]) -> str:
@@ -86,5 +127,7 @@ class Tokenizer:
             Decoded string
         """
         text = self.encoding.decode(tokens)
-        logger.debug(f"Decoded {len(tokens)} tokens into string (length: {len(text)})")
+        logger.debug(
+            "Decoded %d tokens into string (length: %d)", len(tokens), len(text)
+        )
         return text
@@ -6,9 +6,9 @@ Script to check the actual database schema and compare with expected models.
 import logging
 import os
 import sys
+from collections import defaultdict
 
-from sqlalchemy import inspect, text
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import text
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -41,59 +41,59 @@ def print_column_info(column):
 def check_schema():
     """Check the database schema and compare with SQLAlchemy models"""
     try:
-        # Create inspector to examine the database
-        inspector = inspect(engine)
+        # One information_schema round trip for every table and column, rather
+        # than separate Inspector calls per table
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT table_name, column_name, data_type, is_nullable"
+                    " FROM information_schema.columns"
+                    " WHERE table_schema = current_schema()"
+                    " ORDER BY table_name, ordinal_position"
+                )
+            ).fetchall()
 
-        # Get all tables in the database
-        tables = inspector.get_table_names()
-        logger.info(f"Tables in database: {tables}")
+        columns_by_table = defaultdict(list)
+        for row in rows:
+            columns_by_table[row.table_name].append(row)
+        logger.info(f"Tables in database: {list(columns_by_table)}")
 
         # Check if document table exists
-        if "document" in tables:
-            columns = inspector.get_columns("document")
+        if "document" in columns_by_table:
+            columns = columns_by_table["document"]
             logger.info("Document table columns:")
             for column in columns:
                 logger.info(
-                    f"  {column['name']}: {column['type']} (nullable: {column['nullable']})"
+                    f"  {column.column_name}: {column.data_type}"
+                    f" (nullable: {column.is_nullable == 'YES'})"
                 )
 
             # Get SQLAlchemy model columns
-            model_columns = {c.name: c for c in Document.__table__.columns}
+            model_columns = Document.__table__.columns
             logger.info("SQLAlchemy Document model columns:")
-            for name, column in model_columns.items():
-                logger.info(f"  {name}: {column.type} (nullable: {column.nullable})")
+            for column in model_columns:
+                logger.info(
+                    f"  {column.name}: {column.type} (nullable: {column.nullable})"
+                )
 
             # Compare columns
-            db_column_names = {c["name"] for c in columns}
-            model_column_names = set(model_columns.keys())
+            db_column_names = frozenset(c.column_name for c in columns)
+            model_column_names = frozenset(model_columns.keys())
 
             missing_in_db = model_column_names - db_column_names
             if missing_in_db:
                 logger.error(
-                    f"Columns in model but missing in database: {missing_in_db}"
+                    f"Columns in model but missing in database: {sorted(missing_in_db)}"
                 )
 
             extra_in_db = db_column_names - model_column_names
             if extra_in_db:
-                logger.warning(f"Columns in database but not in model: {extra_in_db}")
+                logger.warning(
+                    f"Columns in database but not in model: {sorted(extra_in_db)}"
+                )
         else:
             logger.error("Document table does not exist in the database")
 
-        # Also check the SQL query directly
-        with engine.connect() as conn:
-            try:
-                result = conn.execute(
-                    text(
-                        "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = 'document'"
-                    )
-                )
-                rows = result.fetchall()
-                logger.info("Document table columns from information_schema:")
-                for row in rows:
-                    logger.info(f"  {row[0]}: {row[1]}")
-            except SQLAlchemyError as e:
-                logger.error(f"Error querying information_schema: {e}")
-
     except Exception as e:
         logger.error(f"Error checking schema: {e}")
         raise
@@ -18,64 +18,62 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-try:
-    from app.db.base import Base
-    from app.db.session import SessionLocal, engine
-    from app.models.document import Document, DocumentChunk
-except ImportError as e:
-    logger.error(f"Error importing app modules: {e}")
-    sys.exit(1)
-
 
 def reset_database():
     """Drop all tables and recreate them"""
+    # Imported here so cancelling at the confirmation prompt skips loading the
+    # app settings, models and engine
+    try:
+        from app.db.base import Base
+        from app.db.init_db import pgvector_installed
+        from app.db.session import engine
+
+        # Registers the tables on Base.metadata
+        from app.models.document import Document, DocumentChunk  # noqa: F401
+    except ImportError as e:
+        logger.error(f"Error importing app modules: {e}")
+        return False
+
     try:
-        # Check if pgvector extension is installed
-        with engine.connect() as conn:
+        # One connection and transaction for the whole reset, so a failed
+        # create_all leaves the old tables in place
+        with engine.begin() as conn:
+            # Check if pgvector extension is installed. The savepoint keeps a
+            # failed install from aborting the outer transaction
             try:
-                result = conn.execute(
-                    text(
-                        "SELECT EXISTS(SELECT 1 FROM pg_extension WHERE extname = 'vector')"
-                    )
-                )
-                has_vector = result.scalar()
-                if not has_vector:
-                    logger.warning(
-                        "pgvector extension not found. Attempting to install..."
-                    )
-                    conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
-                    logger.info("pgvector extension installed")
+                with conn.begin_nested():
+                    if not pgvector_installed(conn):
+                        logger.warning(
+                            "pgvector extension not found. Attempting to install..."
+                        )
+                        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+                        logger.info("pgvector extension installed")
             except Exception as e:
                 logger.error(f"Error checking/installing pgvector: {e}")
                 logger.warning("Continuing without pgvector extension")
 
-        # Drop existing tables
-        logger.info("Dropping all tables...")
-        Base.metadata.drop_all(bind=engine)
-        logger.info("All tables dropped successfully")
+            # Drop existing tables
+            logger.info("Dropping all tables...")
+            Base.metadata.drop_all(bind=conn)
+            logger.info("All tables dropped successfully")
 
-        # Create tables
-        logger.info("Creating tables...")
-        Base.metadata.create_all(bind=engine)
-        logger.info("Tables created successfully")
+            # Create tables
+            logger.info("Creating tables...")
+            Base.metadata.create_all(bind=conn)
+            logger.info("Tables created successfully")
 
-        # Verify tables were created
-        with engine.connect() as conn:
-            result = conn.execute(
+            # Verify tables were created, listing the tables and the document
+            # table's columns in one query
+            tables, columns = conn.execute(
                 text(
-                    "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'"
+                    "SELECT"
+                    " ARRAY(SELECT table_name::text FROM information_schema.tables"
+                    " WHERE table_schema = 'public'),"
+                    " ARRAY(SELECT column_name::text FROM information_schema.columns"
+                    " WHERE table_name = 'document')"
                 )
-            )
-            tables = [row[0] for row in result]
+            ).one()
             logger.info(f"Tables in database: {tables}")
-
-            # Check document table columns
-            result = conn.execute(
-                text(
-                    "SELECT column_name FROM information_schema.columns WHERE table_name = 'document'"
-                )
-            )
-            columns = [row[0] for row in result]
             logger.info(f"Columns in document table: {columns}")
 
             # Verify id column exists
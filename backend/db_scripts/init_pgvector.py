@@ -10,23 +10,8 @@ from app.db.session import SessionLocal
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def check_pgvector_installed():
-    """Check if pgvector extension is installed."""
-    db = SessionLocal()
-    try:
-        result = db.execute(
-            text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'vector')")
-        ).scalar()
-        return bool(result)
-    except Exception as e:
-        logger.error(f"Error checking if pgvector is installed: {str(e)}")
-        return False
-    finally:
-        db.close()
-
-def install_pgvector():
+def install_pgvector(db):
     """Install the pgvector extension."""
-    db = SessionLocal()
     try:
         db.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
         db.commit()
@@ -36,29 +21,25 @@ def install_pgvector():
         logger.error(f"Error installing pgvector: {str(e)}")
         db.rollback()
         return False
-    finally:
-        db.close()
 
-def test_cosine_similarity():
+def test_cosine_similarity(db):
     """Test if the pgvector operators work."""
-    db = SessionLocal()
     try:
-        # Test the <-> operator (vector distance) instead of cosine_similarity function
+        # Cosine distance on vector values; plain float[] arrays have no
+        # pgvector operators, so the casts are what is being tested
         result = db.execute(
-            text("SELECT 1 - (ARRAY[1,2,3]::float[] <-> ARRAY[4,5,6]::float[]) as similarity")
+            text("SELECT 1 - (ARRAY[1,2,3]::vector <=> ARRAY[4,5,6]::vector) as similarity")
         ).scalar()
         logger.info(f"Vector operator test result: {result}")
         return True
     except Exception as e:
         logger.error(f"Error testing pgvector operators: {str(e)}")
+        db.rollback()
         return False
-    finally:
-        db.close()
 
-def reinstall_pgvector():
+def reinstall_pgvector(db):
     """Reinstall the pgvector extension by dropping and recreating it."""
     # First drop the extension
-    db = SessionLocal()
     try:
         db.execute(text("DROP EXTENSION IF EXISTS vector CASCADE;"))
         db.commit()
@@ -66,43 +47,46 @@ def reinstall_pgvector():
     except Exception as e:
         logger.error(f"Error dropping pgvector extension: {str(e)}")
         db.rollback()
-    finally:
-        db.close()
     
     # Then reinstall it
-    return install_pgvector()
+    return install_pgvector(db)
 
-def init_pgvector():
+def init_pgvector(db):
     """Initialize the pgvector extension in the database."""
-    # Check if pgvector is installed
-    if check_pgvector_installed():
-        logger.info("pgvector extension is already installed.")
-        
-        # Verify that cosine_similarity function exists
-        logger.info("Verifying cosine_similarity function...")
-        if test_cosine_similarity():
-            logger.info("pgvector operators are working correctly.")
-            return True
-        else:
-            logger.info("Trying to repair by reinstalling pgvector extension...")
-            return reinstall_pgvector()
-    else:
-        # Install pgvector
-        logger.info("Installing pgvector extension...")
-        return install_pgvector()
+    # A working operator implies the extension is installed, so the common
+    # case needs a single query
+    logger.info("Verifying pgvector operators...")
+    if test_cosine_similarity(db):
+        logger.info("pgvector extension is installed and its operators are working correctly.")
+        return True
+
+    # CREATE EXTENSION IF NOT EXISTS is a no-op when it's already there, so
+    # there's no need to check pg_extension first
+    logger.info("Installing pgvector extension...")
+    if install_pgvector(db) and test_cosine_similarity(db):
+        return True
+
+    # Installed but still broken
+    logger.info("Trying to repair by reinstalling pgvector extension...")
+    return reinstall_pgvector(db)
 
 if __name__ == "__main__":
     logger.info("Initializing pgvector extension...")
-    success = init_pgvector()
-    
-    if success:
-        # Verify one more time
-        if test_cosine_similarity():
-            logger.info("pgvector extension is now properly installed and working.")
+    # One session for the whole run rather than one per check
+    db = SessionLocal()
+    try:
+        success = init_pgvector(db)
+        
+        if success:
+            # Verify one more time
+            if test_cosine_similarity(db):
+                logger.info("pgvector extension is now properly installed and working.")
+            else:
+                logger.error("pgvector extension is installed but the pgvector operators are still not working.")
+                logger.error("You may need to check your PostgreSQL installation and make sure you have the correct version of pgvector.")
         else:
-            logger.error("pgvector extension is installed but the pgvector operators are still not working.")
-            logger.error("You may need to check your PostgreSQL installation and make sure you have the correct version of pgvector.")
-    else:
-        logger.error("Failed to initialize pgvector extension.")
+            logger.error("Failed to initialize pgvector extension.")
+    finally:
+        db.close()
         
     logger.info("Done.") 
\ No newline at end of file
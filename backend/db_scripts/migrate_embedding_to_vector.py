@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Script to migrate document chunk embeddings (float8[] or vector) to pgvector
+halfvec(dim) and build the HNSW index used by vector search. Existing data is
+kept. Requires pgvector 0.7 or later on the server.
+
+Pass --rebuild-index to drop and rebuild the index, e.g. after the collection
+has grown into a larger parameter tier. Pass --binary-index to also build the
+binary-quantized HNSW index used when BINARY_QUANTIZED_SEARCH is enabled.
+"""
+
+import logging
+import os
+import sys
+
+from sqlalchemy import text
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+try:
+    from app.core.config import settings
+    from app.db.init_db import BINARY_QUANTIZED_EMBEDDING, estimate_rows, hnsw_params
+    from app.db.session import engine
+    from app.models.document import DocumentChunk
+except ImportError as e:
+    logger.error(f"Error importing app modules: {e}")
+    sys.exit(1)
+
+TABLE = DocumentChunk.__tablename__
+INDEX = "ix_document_chunk_embedding_hnsw"
+BINARY_INDEX = "ix_document_chunk_embedding_bq_hnsw"
+
+
+def build_hnsw_index(rebuild=False, binary=False):
+    """Create the HNSW index with parameters sized for the current chunk count"""
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        chunk_count = estimate_rows(conn, TABLE)
+        params = hnsw_params(chunk_count)
+        logger.info(
+            f"~{chunk_count} chunks: m={params.m},"
+            f" ef_construction={params.ef_construction}"
+        )
+
+        if rebuild:
+            logger.info("Dropping existing HNSW index...")
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX}"))
+
+        # Building the graph in memory with parallel workers is much faster
+        conn.execute(text("SET maintenance_work_mem = '2GB'"))
+        conn.execute(text("SET max_parallel_maintenance_workers = 7"))
+
+        logger.info("Creating HNSW index (this can take a while)...")
+        conn.execute(
+            text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX} ON {TABLE}"
+                " USING hnsw (embedding halfvec_cosine_ops)"
+                f" WITH (m = {params.m}, ef_construction = {params.ef_construction})"
+            )
+        )
+        logger.info("HNSW index is in place")
+
+        if binary:
+            if rebuild:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {BINARY_INDEX}"))
+            logger.info("Creating binary-quantized HNSW index...")
+            conn.execute(
+                text(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {BINARY_INDEX} ON {TABLE}"
+                    f" USING hnsw (({BINARY_QUANTIZED_EMBEDDING}) bit_hamming_ops)"
+                    f" WITH (m = {params.m},"
+                    f" ef_construction = {params.ef_construction})"
+                )
+            )
+            logger.info("Binary-quantized HNSW index is in place")
+
+
+def migrate_embeddings():
+    """Convert the embedding column to halfvec(dim) and create the HNSW index"""
+    dimension = settings.EMBEDDING_DIMENSION
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+
+            column_type = conn.execute(
+                text(
+                    "SELECT udt_name FROM information_schema.columns"
+                    " WHERE table_name = :table AND column_name = 'embedding'"
+                ),
+                {"table": TABLE},
+            ).scalar()
+            logger.info(f"Current embedding column type: {column_type}")
+
+            if column_type is None:
+                logger.error(f"Table '{TABLE}' has no embedding column")
+                return False
+
+            if column_type != "halfvec":
+                # An index built with vector_cosine_ops can't survive the type
+                # change; it is rebuilt below
+                conn.execute(text(f"DROP INDEX IF EXISTS {INDEX}"))
+                logger.info(f"Converting embedding column to halfvec({dimension})...")
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {TABLE} ALTER COLUMN embedding"
+                        f" TYPE halfvec({dimension})"
+                        f" USING embedding::halfvec({dimension})"
+                    )
+                )
+                logger.info("Embedding column converted")
+            else:
+                logger.info("Embedding column is already a halfvec")
+
+        build_hnsw_index(
+            rebuild="--rebuild-index" in sys.argv,
+            binary="--binary-index" in sys.argv,
+        )
+
+        return True
+    except Exception as e:
+        logger.error(f"Error migrating embeddings: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    logger.info("Starting embedding column migration")
+    if migrate_embeddings():
+        logger.info("Embedding migration completed")
+    else:
+        logger.error("Embedding migration failed")
+        sys.exit(1)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Script to load the HNSW vector indexes into PostgreSQL's buffer cache.
+
+HNSW search hops between index pages one at a time, so the first queries after
+a restart wait on a serial chain of disk reads. Run this after the database
+starts (or after rebuilding an index) so those pages are already cached.
+"""
+
+import logging
+import os
+import sys
+
+from sqlalchemy import text
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+try:
+    from app.db.session import engine
+except ImportError as e:
+    logger.error(f"Error importing app modules: {e}")
+    sys.exit(1)
+
+INDEXES = ("ix_document_chunk_embedding_hnsw", "ix_document_chunk_embedding_bq_hnsw")
+
+
+def prewarm_vector_indexes():
+    """Read every existing HNSW index into shared buffers with pg_prewarm"""
+    try:
+        with engine.begin() as conn:
+            # pg_prewarm ships with PostgreSQL's contrib modules
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_prewarm"))
+
+            for index in INDEXES:
+                exists = conn.execute(
+                    text("SELECT to_regclass(:index) IS NOT NULL"), {"index": index}
+                ).scalar()
+                if not exists:
+                    logger.info(f"Index {index} does not exist, skipping")
+                    continue
+
+                blocks = conn.execute(
+                    text("SELECT pg_prewarm(CAST(:index AS regclass))"),
+                    {"index": index},
+                ).scalar()
+                logger.info(f"Loaded {blocks} blocks of {index} into shared buffers")
+
+        return True
+    except Exception as e:
+        logger.error(f"Error prewarming vector indexes: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    logger.info("Starting vector index prewarm")
+    if prewarm_vector_indexes():
+        logger.info("Vector index prewarm completed")
+    else:
+        logger.error("Vector index prewarm failed")
+        sys.exit(1)
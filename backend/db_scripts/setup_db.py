@@ -9,6 +9,7 @@ import os
 import sys
 
 import psycopg2
+from psycopg2 import sql
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 
 # Add the parent directory to the Python path
@@ -58,7 +59,12 @@ def setup_database():
         # Create database if it doesn't exist
         if not db_exists:
             logger.info(f"Creating database '{settings.POSTGRES_DB}'...")
-            cursor.execute(f"CREATE DATABASE {settings.POSTGRES_DB}")
+            # Identifiers can't be bound as parameters; quote the name instead
+            cursor.execute(
+                sql.SQL("CREATE DATABASE {}").format(
+                    sql.Identifier(settings.POSTGRES_DB)
+                )
+            )
             logger.info(f"Database '{settings.POSTGRES_DB}' created successfully.")
         else:
             logger.info(f"Database '{settings.POSTGRES_DB}' already exists.")
@@ -78,27 +84,19 @@ def setup_database():
         conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
         cursor = conn.cursor()
 
-        # Check if pgvector extension is installed
-        logger.info("Checking if pgvector extension is installed...")
-        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'vector'")
-        vector_exists = cursor.fetchone()
-
-        # Create pgvector extension if it doesn't exist
-        if not vector_exists:
-            logger.info("Installing pgvector extension...")
-            try:
-                cursor.execute("CREATE EXTENSION vector")
-                logger.info("pgvector extension installed successfully.")
-            except psycopg2.Error as e:
-                logger.error(f"Failed to install pgvector extension: {str(e)}")
-                logger.error(
-                    "You may need to install the pgvector extension in your PostgreSQL server first."
-                )
-                logger.error(
-                    "See https://github.com/pgvector/pgvector for installation instructions."
-                )
-        else:
-            logger.info("pgvector extension is already installed.")
+        # Install pgvector; IF NOT EXISTS makes this a no-op when it's there
+        logger.info("Ensuring pgvector extension is installed...")
+        try:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            logger.info("pgvector extension is installed.")
+        except psycopg2.Error as e:
+            logger.error(f"Failed to install pgvector extension: {str(e)}")
+            logger.error(
+                "You may need to install the pgvector extension in your PostgreSQL server first."
+            )
+            logger.error(
+                "See https://github.com/pgvector/pgvector for installation instructions."
+            )
 
         # Close connection
         cursor.close()
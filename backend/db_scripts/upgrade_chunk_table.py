@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Script to bring an existing document chunk table up to the current model's
+indexes and constraints without dropping data.
+"""
+
+import logging
+import os
+import sys
+
+from sqlalchemy import text
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+try:
+    from app.db.session import engine
+    from app.models.document import DocumentChunk
+except ImportError as e:
+    logger.error(f"Error importing app modules: {e}")
+    sys.exit(1)
+
+TABLE = DocumentChunk.__tablename__
+FOREIGN_KEY = f"{TABLE}_document_id_fkey"
+
+
+def upgrade_chunk_table():
+    """Create the chunk indexes, full-text column and cascading document foreign key"""
+    try:
+        # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            logger.info("Creating (document_id, chunk_index) index...")
+            conn.execute(
+                text(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chunk_doc_idx"
+                    f" ON {TABLE} (document_id, chunk_index)"
+                )
+            )
+            # The composite index serves document_id lookups on its own
+            conn.execute(
+                text(f"DROP INDEX CONCURRENTLY IF EXISTS ix_{TABLE}_document_id")
+            )
+            logger.info("Chunk indexes are up to date")
+
+            # Full-text column and index for the text-search fallback. Adding
+            # a stored generated column rewrites the table once.
+            logger.info("Adding content_tsv column...")
+            conn.execute(
+                text(
+                    f"ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS content_tsv tsvector"
+                    " GENERATED ALWAYS AS (to_tsvector('english', content)) STORED"
+                )
+            )
+            logger.info("Creating content_tsv GIN index...")
+            conn.execute(
+                text(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS"
+                    f" ix_document_chunk_content_tsv"
+                    f" ON {TABLE} USING gin (content_tsv)"
+                )
+            )
+            logger.info("Full-text search column is in place")
+
+            has_foreign_key = conn.execute(
+                text("SELECT 1 FROM pg_constraint WHERE conname = :name"),
+                {"name": FOREIGN_KEY},
+            ).first()
+            if has_foreign_key:
+                logger.info("Cascading document foreign key already exists")
+            else:
+                # Chunks left behind by earlier two-step deletes would fail
+                # validation
+                orphans = conn.execute(
+                    text(
+                        f"DELETE FROM {TABLE} c WHERE NOT EXISTS"
+                        " (SELECT 1 FROM document d WHERE d.id = c.document_id)"
+                    )
+                ).rowcount
+                logger.info(f"Removed {orphans} orphaned chunks")
+
+                # NOT VALID + VALIDATE avoids holding a long exclusive lock
+                logger.info("Adding cascading document foreign key...")
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {TABLE} ADD CONSTRAINT {FOREIGN_KEY}"
+                        " FOREIGN KEY (document_id) REFERENCES document (id)"
+                        " ON DELETE CASCADE NOT VALID"
+                    )
+                )
+                conn.execute(
+                    text(f"ALTER TABLE {TABLE} VALIDATE CONSTRAINT {FOREIGN_KEY}")
+                )
+                logger.info("Foreign key added")
+
+        return True
+    except Exception as e:
+        logger.error(f"Error upgrading chunk table: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    logger.info("Starting chunk table upgrade")
+    if upgrade_chunk_table():
+        logger.info("Chunk table upgrade completed")
+    else:
+        logger.error("Chunk table upgrade failed")
+        sys.exit(1)
@@ -4,41 +4,39 @@ Generate requirements.txt from Poetry's pyproject.toml
 
 This script extracts dependencies from pyproject.toml and writes them to requirements.txt
 """
-import re
 import sys
 from pathlib import Path
 
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    import tomli as tomllib
+
 
 def extract_deps_from_pyproject(pyproject_path):
     """Extract dependencies from pyproject.toml"""
-    with open(pyproject_path, "r") as f:
-        content = f.read()
-
-    # Extract the main dependencies section
-    deps_section = re.search(
-        r"\[tool\.poetry\.dependencies\](.*?)(?=\[tool|$)", content, re.DOTALL
-    )
-    if not deps_section:
+    with open(pyproject_path, "rb") as f:
+        pyproject = tomllib.load(f)
+
+    try:
+        dependencies = pyproject["tool"]["poetry"]["dependencies"]
+    except KeyError:
         print("Could not find dependencies section in pyproject.toml")
         sys.exit(1)
 
-    deps_text = deps_section.group(1)
-
-    # Parse dependencies
     deps = []
-    for line in deps_text.strip().split("\n"):
-        line = line.strip()
-        if not line or line.startswith("#") or line == "python = ":
+    for package, spec in dependencies.items():
+        # The interpreter constraint isn't an installable package
+        if package == "python":
+            continue
+
+        # Inline tables carry the version alongside extras/markers
+        version = spec.get("version") if isinstance(spec, dict) else spec
+        if not version:
             continue
 
-        # Match package name and version
-        match = re.match(r'([a-zA-Z0-9\-_]+)\s*=\s*["\']([^"\']+)["\']', line)
-        if match:
-            package, version = match.groups()
-            # Handle caret version range (^x.y.z) by removing the caret
-            if version.startswith("^"):
-                version = version[1:]
-            deps.append(f"{package}=={version}")
+        # Handle caret version range (^x.y.z) by removing the caret
+        deps.append(f"{package}=={version.lstrip('^')}")
 
     return deps
 
@@ -46,7 +44,7 @@ def extract_deps_from_pyproject(pyproject_path):
 def write_requirements_txt(deps, output_path):
     """Write dependencies to requirements.txt"""
     with open(output_path, "w") as f:
-        f.write("\n".join(deps) + "\n")
+        f.writelines(f"{dep}\n" for dep in deps)
 
 
 if __name__ == "__main__":
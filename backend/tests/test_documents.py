@@ -0,0 +1,216 @@
+import io
+import tempfile
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.endpoints import documents
+from app.api.endpoints.documents import _read_upload
+from app.db.session import get_db
+from app.main import app
+from app.services.document import DocumentService
+
+
+def test_read_upload_keeps_small_spooled_files_in_memory():
+    upload = tempfile.SpooledTemporaryFile(max_size=1024)
+    upload.write(b"hello world")
+
+    assert _read_upload(upload, max_size=100) == b"hello world"
+    assert upload.name is None
+
+
+def test_read_upload_reads_rolled_files_from_disk():
+    upload = tempfile.SpooledTemporaryFile(max_size=4)
+    upload.write(b"hello world")
+
+    content = _read_upload(upload, max_size=100)
+
+    assert isinstance(content, bytearray)
+    assert content == b"hello world"
+
+
+def test_read_upload_reads_one_byte_past_the_limit():
+    assert _read_upload(io.BytesIO(b"0123456789"), max_size=4) == b"01234"
+
+    upload = tempfile.SpooledTemporaryFile(max_size=4)
+    upload.write(b"0123456789")
+    assert _read_upload(upload, max_size=4) == b"01234"
+
+
+DOCUMENT_ID = uuid.UUID("12345678-1234-5678-1234-567812345678")
+
+
+def make_document(is_processed=False):
+    # Shaped like a get_document_summary / get_all_documents row
+    return SimpleNamespace(
+        id=DOCUMENT_ID,
+        filename="guide.pdf",
+        created_at=datetime(2024, 1, 1),
+        updated_at=datetime(2024, 1, 2),
+        is_processed=is_processed,
+    )
+
+
+def test_document_summary_does_not_load_content():
+    db = mock.Mock()
+    DocumentService.get_document_summary(db, str(DOCUMENT_ID))
+
+    statement = db.execute.call_args.args[0]
+    assert [column.name for column in statement.selected_columns] == [
+        "id",
+        "filename",
+        "created_at",
+        "updated_at",
+        "is_processed",
+    ]
+
+
+def test_process_document_stores_null_embeddings_when_huggingface_fails():
+    from app.ml.huggingface_provider import HuggingFaceProvider
+
+    huggingface = HuggingFaceProvider()
+    huggingface.session = mock.Mock()
+    huggingface.session.post.return_value = SimpleNamespace(
+        status_code=500, content=b"", text="internal error"
+    )
+    document = SimpleNamespace(
+        id=DOCUMENT_ID, filename="guide.txt", content="Some text.", chunk_ids=[]
+    )
+    tokenizer = mock.Mock()
+    tokenizer.count_tokens.return_value = [3]
+
+    with mock.patch(
+        "app.services.document.get_model_provider", return_value=huggingface
+    ), mock.patch(
+        "app.services.document.Tokenizer", return_value=tokenizer
+    ), mock.patch.object(
+        DocumentService, "_copy_chunks"
+    ) as copy_chunks:
+        chunk_ids = DocumentService.process_document(mock.Mock(), document)
+
+    (rows,) = copy_chunks.call_args.args[1:]
+    assert [row[0] for row in rows] == chunk_ids
+    # The chunk is kept for text search, without a zero-vector embedding
+    assert rows[0][3] == "Some text."
+    assert rows[0][4] is None
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_db] = lambda: mock.Mock()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_get_document_revalidates_with_etag(client):
+    with mock.patch.object(
+        documents.DocumentService, "get_document_summary", return_value=make_document()
+    ):
+        response = client.get(f"/api/v1/documents/{DOCUMENT_ID}")
+        etag = response.headers["etag"]
+        cached = client.get(
+            f"/api/v1/documents/{DOCUMENT_ID}", headers={"If-None-Match": etag}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "Processing"
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+
+
+def test_get_document_etag_changes_once_processed(client):
+    with mock.patch.object(
+        documents.DocumentService, "get_document_summary", return_value=make_document()
+    ):
+        etag = client.get(f"/api/v1/documents/{DOCUMENT_ID}").headers["etag"]
+    with mock.patch.object(
+        documents.DocumentService,
+        "get_document_summary",
+        return_value=make_document(is_processed=True),
+    ):
+        response = client.get(
+            f"/api/v1/documents/{DOCUMENT_ID}", headers={"If-None-Match": etag}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "Processed"
+
+
+def test_get_documents_revalidates_with_etag(client):
+    with mock.patch.object(
+        documents.DocumentService, "get_all_documents", return_value=[make_document()]
+    ):
+        response = client.get("/api/v1/documents/")
+        cached = client.get(
+            "/api/v1/documents/", headers={"If-None-Match": response.headers["etag"]}
+        )
+
+    assert response.status_code == 200
+    assert [item["filename"] for item in response.json()] == ["guide.pdf"]
+    assert cached.status_code == 304
+
+
+def test_get_document_not_found(client):
+    with mock.patch.object(
+        documents.DocumentService, "get_document_summary", return_value=None
+    ):
+        response = client.get(f"/api/v1/documents/{DOCUMENT_ID}")
+
+    assert response.status_code == 404
+
+
+def test_delete_document_status_codes(client):
+    with mock.patch.object(
+        documents.DocumentService, "delete_document", return_value=True
+    ):
+        assert client.delete(f"/api/v1/documents/{DOCUMENT_ID}").status_code == 204
+    with mock.patch.object(
+        documents.DocumentService, "delete_document", return_value=False
+    ):
+        assert client.delete(f"/api/v1/documents/{DOCUMENT_ID}").status_code == 404
+
+
+def test_upload_rejects_unsupported_media_type(client):
+    response = client.post(
+        "/api/v1/documents/",
+        files={"file": ("photo.png", b"\x89PNG", "image/png")},
+    )
+
+    assert response.status_code == 415
+
+
+def test_upload_rejects_oversized_files(client):
+    with mock.patch.object(documents, "MAX_UPLOAD_SIZE", 4):
+        response = client.post(
+            "/api/v1/documents/",
+            files={"file": ("notes.txt", b"0123456789", "text/plain")},
+        )
+
+    assert response.status_code == 413
+
+
+def test_stream_chunks_json_does_not_close_the_array_on_error():
+    def broken_chunks():
+        yield SimpleNamespace(
+            id=uuid.uuid4(),
+            document_id=DOCUMENT_ID,
+            chunk_index=0,
+            content="Alpha.",
+            token_count=2,
+            created_at=datetime(2024, 1, 1),
+        )
+        raise RuntimeError("cursor closed")
+
+    stream = documents._stream_chunks_json(broken_chunks(), DOCUMENT_ID)
+    body = []
+    with pytest.raises(RuntimeError):
+        for part in stream:
+            body.append(part)
+
+    assert body[0] == b"["
+    assert not b"".join(body).endswith(b"]")
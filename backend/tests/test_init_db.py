@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db import init_db as init_db_module
+from app.db.init_db import DatabaseSchemaError, init_db
+from app.main import app
+
+
+class FakeConnection:
+    def __init__(self, **support):
+        self.support = SimpleNamespace(**support)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def begin_nested(self):
+        return self
+
+    def execute(self, statement):
+        return mock.Mock(one=mock.Mock(return_value=self.support))
+
+
+def run_init_db(
+    has_halfvec, embedding_type, has_cascade_delete=True, has_content_tsv=True
+):
+    conn = FakeConnection(
+        has_halfvec=has_halfvec,
+        embedding_type=embedding_type,
+        has_cascade_delete=has_cascade_delete,
+        has_content_tsv=has_content_tsv,
+    )
+    with mock.patch.object(init_db_module, "engine") as engine, mock.patch.object(
+        init_db_module.Base.metadata, "create_all"
+    ) as create_all:
+        engine.begin.return_value = conn
+        init_db()
+    return create_all
+
+
+def test_init_db_requires_halfvec():
+    with pytest.raises(DatabaseSchemaError, match="pgvector 0.7"):
+        run_init_db(has_halfvec=False, embedding_type=None)
+
+
+def test_init_db_points_old_embedding_columns_at_migration():
+    with pytest.raises(DatabaseSchemaError, match="migrate_embedding_to_vector"):
+        run_init_db(has_halfvec=True, embedding_type="_float8")
+
+
+def test_init_db_points_missing_cascade_at_upgrade_script():
+    with pytest.raises(DatabaseSchemaError, match="upgrade_chunk_table"):
+        run_init_db(
+            has_halfvec=True, embedding_type="halfvec", has_cascade_delete=False
+        )
+
+
+def test_init_db_points_missing_content_tsv_at_upgrade_script():
+    with pytest.raises(DatabaseSchemaError, match="content_tsv"):
+        run_init_db(has_halfvec=True, embedding_type="halfvec", has_content_tsv=False)
+
+
+def test_init_db_skips_table_checks_before_create_all():
+    create_all = run_init_db(
+        has_halfvec=True,
+        embedding_type=None,
+        has_cascade_delete=False,
+        has_content_tsv=False,
+    )
+    create_all.assert_called_once()
+
+
+@pytest.mark.parametrize("embedding_type", [None, "halfvec"])
+def test_init_db_creates_tables(embedding_type):
+    create_all = run_init_db(has_halfvec=True, embedding_type=embedding_type)
+    create_all.assert_called_once()
+
+
+def test_startup_fails_on_unusable_schema():
+    with mock.patch(
+        "app.main.init_db", side_effect=DatabaseSchemaError("no halfvec")
+    ), pytest.raises(DatabaseSchemaError):
+        with TestClient(app):
+            pass
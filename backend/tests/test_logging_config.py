@@ -0,0 +1,47 @@
+import logging
+
+from app.core.logging_config import BatchFileHandler, BatchRotatingFileHandler
+
+
+def make_logger(path, max_bytes=0):
+    target = BatchRotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=2, encoding="utf-8", delay=True
+    )
+    target.setFormatter(logging.Formatter("%(message)s"))
+    target.setLevel(logging.INFO)
+    handler = BatchFileHandler(capacity=100, target=target, flushOnClose=True)
+    logger = logging.Logger("batch-test")
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    return logger, handler, target
+
+
+def test_batch_applies_target_level_and_filters(tmp_path):
+    path = tmp_path / "app.log"
+    logger, handler, target = make_logger(str(path))
+    target.addFilter(lambda record: "secret" not in record.getMessage())
+
+    logger.info("first")
+    logger.debug("too verbose")
+    logger.info("secret token")
+    logger.info("second")
+    handler.close()
+    target.close()
+
+    assert path.read_text(encoding="utf-8") == "first\nsecond\n"
+
+
+def test_batch_rollover_counts_bytes(tmp_path):
+    path = tmp_path / "app.log"
+    logger, handler, target = make_logger(str(path), max_bytes=40)
+
+    # 10 characters but 20 bytes per line
+    for _ in range(3):
+        logger.info("é" * 9)
+    handler.flush()
+    logger.info("é" * 9)
+    handler.close()
+    target.close()
+
+    assert (tmp_path / "app.log.1").read_text(encoding="utf-8") == ("é" * 9 + "\n") * 3
+    assert path.read_text(encoding="utf-8") == "é" * 9 + "\n"
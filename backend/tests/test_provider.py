@@ -0,0 +1,110 @@
+import asyncio
+import inspect
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.ml import provider
+from app.ml.local_provider import LocalProvider
+
+
+def test_local_provider_aclose_closes_clients():
+    local = LocalProvider()
+    asyncio.run(local.aclose())
+
+    assert local.aclient.is_closed
+    assert local._executor._shutdown
+
+
+def test_shutdown_closes_shared_provider():
+    local = LocalProvider()
+    provider.get_model_provider.cache_clear()
+    with mock.patch("app.main.init_db"), mock.patch.object(
+        provider, "settings", mock.Mock(MODEL_PROVIDER="local")
+    ), mock.patch("app.ml.local_provider.LocalProvider", return_value=local):
+        with TestClient(app):
+            assert provider.get_model_provider() is local
+
+    assert local.aclient.is_closed
+    assert provider.get_model_provider.cache_info().currsize == 0
+
+
+def test_no_cache_is_keyword_only_on_every_provider():
+    from app.ml.base import ModelProvider
+    from app.ml.huggingface_provider import HuggingFaceProvider
+    from app.ml.openai_provider import OpenAIProvider
+
+    for cls in (ModelProvider, LocalProvider, HuggingFaceProvider, OpenAIProvider):
+        for name in (
+            "generate_completion",
+            "generate_completion_async",
+            "generate_completion_stream",
+        ):
+            parameter = inspect.signature(getattr(cls, name)).parameters["no_cache"]
+            assert parameter.kind is inspect.Parameter.KEYWORD_ONLY, (cls, name)
+
+
+def make_openai_provider():
+    from app.ml.openai_provider import OpenAIProvider
+
+    openai = OpenAIProvider()
+
+    def create(model, input, **options):
+        texts = input if isinstance(input, list) else [input]
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(embedding=[float(len(text))] * openai.dimension)
+                for text in texts
+            ]
+        )
+
+    openai.client = mock.Mock()
+    openai.client.embeddings.create.side_effect = create
+    return openai
+
+
+def test_openai_embeddings_are_deduplicated_and_cached():
+    openai = make_openai_provider()
+
+    embeddings = openai.get_embeddings(["a", "bb", "a"])
+    np.testing.assert_array_equal(embeddings[:, 0], [1.0, 2.0, 1.0])
+    assert openai.get_embedding("bb")[0] == 2.0
+    assert openai.client.embeddings.create.call_count == 1
+
+
+def test_openai_zero_embedding_is_not_cached():
+    openai = make_openai_provider()
+    openai.client.embeddings.create.side_effect = lambda **kw: SimpleNamespace(
+        data=[SimpleNamespace(embedding=[0.0] * openai.dimension)]
+    )
+
+    openai.get_embedding("a")
+    assert len(openai._cache) == 0
+
+
+def make_huggingface_provider(status_code):
+    from app.ml.huggingface_provider import HuggingFaceProvider
+
+    huggingface = HuggingFaceProvider()
+    huggingface.session = mock.Mock()
+    huggingface.session.post.return_value = SimpleNamespace(
+        status_code=status_code, content=b"[]", text="model is loading"
+    )
+    return huggingface
+
+
+def test_huggingface_embedding_failures_raise():
+    from app.ml.base import EmbeddingError
+
+    huggingface = make_huggingface_provider(503)
+
+    with pytest.raises(EmbeddingError):
+        huggingface.get_embedding("a")
+    # The failed batch falls back to single texts, which raise too
+    with pytest.raises(EmbeddingError):
+        huggingface.get_embeddings(["a", "b"])
+    assert len(huggingface._cache) == 0
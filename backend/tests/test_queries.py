@@ -0,0 +1,139 @@
+import asyncio
+from unittest import mock
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.endpoints import queries
+from app.db.session import get_db
+from app.main import app
+
+CHUNKS = [
+    {"document_filename": "guide.pdf", "chunk_index": 0, "content": "Alpha."},
+    {"document_filename": "guide.pdf", "chunk_index": 2, "content": "Beta."},
+]
+
+
+class FakeProvider:
+    def generate_completion_stream(self, prompt, context, *args, **kwargs):
+        yield "Hello"
+        yield " world"
+
+    async def generate_completion_async(self, prompt, context, *args, **kwargs):
+        return {"text": f"Answer from {context!r}"}
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_db] = lambda: mock.Mock()
+    with mock.patch.object(
+        queries, "get_model_provider", return_value=FakeProvider()
+    ), mock.patch.object(
+        queries.SearchService, "get_query_embedding", return_value=None
+    ):
+        yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def parse_events(body: bytes):
+    events = []
+    for block in body.decode().strip().split("\n\n"):
+        event = None
+        for line in block.split("\n"):
+            if line.startswith("event: "):
+                event = line[len("event: ") :]
+            elif line.startswith("data: "):
+                events.append((event, orjson.loads(line[len("data: ") :])))
+    return events
+
+
+def test_query_returns_answer_and_sources(client):
+    with mock.patch.object(
+        queries.SearchService, "search_documents", return_value=CHUNKS
+    ):
+        response = client.post("/api/v1/queries/", json={"question": "What?"})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "question": "What?",
+        "answer": "Answer from 'Alpha.\\n\\nBeta.'",
+        "sources": ["guide.pdf (Chunk 1)", "guide.pdf (Chunk 3)"],
+    }
+
+
+def assert_off_the_event_loop(result):
+    def call(*args, **kwargs):
+        # get_running_loop only succeeds in code running on the event loop
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()
+        return result
+
+    return call
+
+
+def test_search_and_query_embedding_run_off_the_event_loop(client):
+    with mock.patch.object(
+        queries.SearchService,
+        "search_documents",
+        side_effect=assert_off_the_event_loop(CHUNKS),
+    ) as search, mock.patch.object(
+        queries.SearchService,
+        "get_query_embedding",
+        side_effect=assert_off_the_event_loop(None),
+    ) as embed:
+        answer = client.post("/api/v1/queries/", json={"question": "What?"})
+        stream = client.post("/api/v1/queries/stream", json={"question": "What?"})
+
+    assert answer.status_code == 200
+    assert stream.status_code == 200
+    assert search.call_count == 2
+    assert embed.call_count == 2
+
+
+def test_stream_sends_sources_fragments_and_done(client):
+    with mock.patch.object(
+        queries.SearchService, "search_documents", return_value=CHUNKS
+    ):
+        response = client.post("/api/v1/queries/stream", json={"question": "What?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    assert parse_events(response.content) == [
+        ("sources", ["guide.pdf (Chunk 1)", "guide.pdf (Chunk 3)"]),
+        (None, "Hello"),
+        (None, " world"),
+        ("done", None),
+    ]
+
+
+def test_stream_without_results_still_completes(client):
+    with mock.patch.object(queries.SearchService, "search_documents", return_value=[]):
+        response = client.post("/api/v1/queries/stream", json={"question": "What?"})
+
+    events = parse_events(response.content)
+    assert events[0] == ("sources", [])
+    assert events[-1] == ("done", None)
+
+
+def test_stream_reports_provider_errors_as_an_event(client):
+    broken = mock.Mock()
+    broken.generate_completion_stream.side_effect = RuntimeError("model down")
+    with mock.patch.object(
+        queries.SearchService, "search_documents", return_value=CHUNKS
+    ), mock.patch.object(queries, "get_model_provider", return_value=broken):
+        response = client.post("/api/v1/queries/stream", json={"question": "What?"})
+
+    events = parse_events(response.content)
+    assert ("error", "Error processing query: model down") in events
+    assert events[-1] == ("done", None)
+
+
+def test_stream_search_failure_is_a_500(client):
+    with mock.patch.object(
+        queries.SearchService, "search_documents", side_effect=RuntimeError("db down")
+    ):
+        response = client.post("/api/v1/queries/stream", json={"question": "What?"})
+
+    assert response.status_code == 500
@@ -0,0 +1,138 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from app.ml.base import EmbeddingError
+from app.ml.cache import RedisEmbeddingCache
+from app.services import search
+from app.services.search import SearchService
+
+
+class FakeProvider:
+    embedding_model = "fake-embedding"
+
+    def __init__(self, embedding):
+        self.embedding = np.asarray(embedding, dtype=np.float32)
+        self.calls = 0
+        self.texts = []
+
+    def get_embedding(self, text):
+        self.calls += 1
+        self.texts.append(text)
+        return self.embedding
+
+
+@pytest.fixture(autouse=True)
+def clear_query_cache():
+    search._get_query_embedding.cache_clear()
+    search._hnsw_state.clear()
+    with mock.patch.object(search, "_shared_query_cache", return_value=None):
+        yield
+    search._get_query_embedding.cache_clear()
+    search._hnsw_state.clear()
+
+
+def test_query_embedding_is_cached_by_normalized_query():
+    provider = FakeProvider([3.0, 4.0])
+    with mock.patch.object(search, "get_model_provider", return_value=provider):
+        first = SearchService.get_query_embedding("  IT   policy ")
+        second = SearchService.get_query_embedding("it policy")
+
+    np.testing.assert_allclose(first, [0.6, 0.8], rtol=1e-6)
+    assert second is first
+    # The original casing is embedded; only the cache key is normalized
+    assert provider.texts == ["IT   policy"]
+
+
+def test_zero_query_embedding_is_not_cached():
+    provider = FakeProvider([0.0, 0.0])
+    with mock.patch.object(search, "get_model_provider", return_value=provider):
+        with pytest.raises(EmbeddingError):
+            search._get_query_embedding(search._QueryKey("hello"))
+        assert SearchService.get_query_embedding("hello") is None
+
+    assert search._get_query_embedding.cache_info().currsize == 0
+    assert provider.calls == 2
+
+
+def test_search_falls_back_to_text_search_without_query_embedding():
+    provider = FakeProvider([0.0, 0.0])
+    fallback_results = [{"chunk_id": "c1", "similarity": 0.5}]
+    with mock.patch.object(
+        search, "get_model_provider", return_value=provider
+    ), mock.patch.object(
+        SearchService, "_fallback_search", return_value=fallback_results
+    ) as fallback:
+        results = SearchService.search_documents(mock.Mock(), "hello", limit=3)
+
+    assert results == fallback_results
+    fallback.assert_called_once()
+
+
+def run_vector_search(limit, chunk_count=0):
+    db = mock.Mock()
+    db.execute.return_value.mappings.return_value.all.return_value = []
+    provider = FakeProvider([1.0, 0.0])
+    with mock.patch.object(
+        search, "get_model_provider", return_value=provider
+    ), mock.patch.object(search, "estimate_rows", return_value=chunk_count):
+        SearchService.search_documents(db, "hello", limit=limit)
+    # The first statement sets ef_search for the transaction
+    return db.execute.call_args_list[0].args[1]["ef_search"]
+
+
+def test_ef_search_covers_the_requested_limit():
+    assert run_vector_search(limit=5) == "40"
+    assert run_vector_search(limit=100) == "100"
+
+
+def test_ef_search_tier_is_refreshed_after_ttl():
+    assert run_vector_search(limit=5) == "40"
+    # Cached: a grown collection doesn't change the tier until the TTL passes
+    assert run_vector_search(limit=5, chunk_count=2_000_000) == "40"
+
+    search._hnsw_state["ef_search"] = (0.0, 40)
+    assert run_vector_search(limit=5, chunk_count=2_000_000) == "200"
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+
+def make_redis_cache():
+    redis_cache = RedisEmbeddingCache("redis://localhost:6379/0", prefix="test")
+    redis_cache._client = FakeRedis()
+    return redis_cache
+
+
+def test_redis_cache_skips_zero_embeddings():
+    redis_cache = make_redis_cache()
+
+    redis_cache.set("model", "failed", np.zeros(3, dtype=np.float32))
+    assert redis_cache._client.store == {}
+
+    # Entries written before zero vectors were filtered read as misses
+    redis_cache._client.store[redis_cache._key("model", "old")] = bytes(12)
+    assert redis_cache.get("model", "old") is None
+
+    redis_cache.set("model", "ok", np.ones(3, dtype=np.float32))
+    np.testing.assert_array_equal(redis_cache.get("model", "ok"), np.ones(3))
+
+
+def test_zero_query_embedding_is_not_written_to_redis():
+    redis_cache = make_redis_cache()
+    provider = FakeProvider([0.0, 0.0])
+    with mock.patch.object(
+        search, "_shared_query_cache", return_value=redis_cache
+    ), mock.patch.object(search, "get_model_provider", return_value=provider):
+        assert SearchService.get_query_embedding("hello") is None
+
+    assert redis_cache._client.store == {}
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from app.utils.text_splitter import TextSplitter
+
+
+def reference_sentence_end(text, start, end, chunk_size):
+    """The original per-character implementation of _find_sentence_end."""
+    for i in range(end - 1, start, -1):
+        if (
+            i < len(text) - 1
+            and text[i] == "."
+            and (text[i + 1] == " " or text[i + 1] == "\n")
+        ):
+            return i
+
+    for punct in ["!", "?"]:
+        last_idx = text.rfind(punct, start, end)
+        if last_idx != -1 and last_idx > start + chunk_size // 2:
+            return last_idx
+
+    return -1
+
+
+@pytest.mark.parametrize(
+    "text, start, end, expected",
+    [
+        # A period right before the range end needs real whitespace after it
+        ("Pi is 3.14159 and more text here", 0, 8, -1),
+        # Periods win over later '!' or '?'
+        ("Hello. World! foo bar baz", 0, 25, 5),
+        # '!' only counts past the middle of the chunk
+        ("Hi! World foo bar baz", 0, 21, -1),
+        ("Hello World foo bar! baz", 0, 24, 19),
+        # The whitespace after a period may sit just past the range
+        ("One two. three", 0, 8, 7),
+        ("No sentence end here", 0, 20, -1),
+    ],
+)
+def test_find_sentence_end(text, start, end, expected):
+    splitter = TextSplitter(chunk_size=20)
+    assert splitter._find_sentence_end(text, start, end) == expected
+
+
+def test_find_sentence_end_matches_reference():
+    rng = random.Random(0)
+    splitter = TextSplitter(chunk_size=16)
+    for _ in range(2000):
+        text = "".join(rng.choice("ab .!?\n") for _ in range(rng.randint(1, 40)))
+        start = rng.randint(0, len(text))
+        end = rng.randint(start, len(text))
+        assert splitter._find_sentence_end(text, start, end) == (
+            reference_sentence_end(text, start, end, splitter.chunk_size)
+        ), (text, start, end)
+
+
+def test_iter_offsets_cover_split_text():
+    text = ("Paragraph one is here.\n\n" * 20) + "Tail without a break " * 10
+    splitter = TextSplitter(chunk_size=100, chunk_overlap=10)
+    chunks = splitter.split_text(text)
+    offsets = list(splitter.iter_offsets(text))
+    assert chunks == [text[start:end] for start, end in offsets]
+    assert offsets[0][0] == 0
+    assert offsets[-1][1] == len(text)
+    assert all(end - start <= 100 for start, end in offsets)